@@ -99,6 +99,11 @@ if __name__ == '__main__':
     ## Process operation ##
 
     if cli.operation() == "meter":
+        try:
+            cci = CCI(filename = DEFAULT_FILE_CONFIG)
+        except Exception as e:
+            aa_abort(e)
+
         if DEBUG_ENABLE: print("Processing Device Calibration Interface...")
         try:
             dci = DCI(cal_file = DEFAULT_FILE_CAL)
@@ -109,7 +114,7 @@ if __name__ == '__main__':
         if DEBUG_ENABLE: print("Loading Application: Audio Meter...")
 
         try:
-            aam = AAM(cli, dci, tmp_dir = DEFAULT_DIR_TMP)
+            aam = AAM(cli, dci, tmp_dir = DEFAULT_DIR_TMP, cci = cci)
         except AssertionError as e:
             traceback.print_tb(sys.exc_info()[2])
             sys.exit(EXIT_FAILURE)
@@ -140,11 +145,16 @@ if __name__ == '__main__':
         except Exception as e:
             aa_abort(e)
     elif cli.operation() == "calibrate":
+        try:
+            cci = CCI(filename = DEFAULT_FILE_CONFIG)
+        except Exception as e:
+            aa_abort(e)
+
         # Application: Interface Calibration
         if DEBUG_ENABLE: print("Loading Application: Interface Calibration...")
 
         try:
-            aic = AIC(cli, tmp_dir = DEFAULT_DIR_TMP)
+            aic = AIC(cli, tmp_dir = DEFAULT_DIR_TMP, cci = cci)
         except AssertionError as e:
             traceback.print_tb(sys.exc_info()[2])
             sys.exit(EXIT_FAILURE)
@@ -20,16 +20,29 @@
 #
 
 
+import multiprocessing
+import os
+
+from multiprocessing import resource_tracker, shared_memory
+
 import numpy as np
 
+#
+# import configuration interfaces
+#
+#  - Device Configuration Interface (DCI)
+#
+from uaa_config import DCI
+
 #
 # import core interfaces
 #
 #  - Signal Data File (SDF)
 #  - Time Domain Analyzer (TDA)
 #  - Frequency Domain Analyzer (FDA)
+#  - Spectrum Analysis Cache (SAC)
 #
-from uaa_core import SDF, TDA, FDA
+from uaa_core import SDF, TDA, FDA, SAC
 
 #
 # import user interfaces
@@ -62,11 +75,23 @@ class AAA():
     __sdf = None              # SDF() object
     __tda = None              # TDA() object
     __fda = None              # FDA() object
-    __fda_multi = None        # list of FDA() objects (multi)
+    __fda_channels = None     # FDA() object of all the channels of a multi-channel file, if requested (fda() is its first channel)
+    __fda_multi = None        # list of FDA() objects (multi), None where not loaded
+    __fda_lru = None          # indexes of the loaded FDA() objects (multi), least recently selected first
+    __metrics_table = None    # dict of metrics curves (multi), as arrays with one value per test frequency
+    __sac = None              # SAC() object (multi)
     __uip = None              # UIP() object
     __with_report_ui = None   # Graphical UI report (charts)
     __with_report_file = None # Text based report (csv, json, etc)
     __view_opts = []          # Visualization options (from config)
+    __fft_workers = None      # Number of FFT worker threads (from CLI or config)
+    __fft_fast_len = None     # Zero-pad averaged segments to the next fast FFT length (from CLI or config)
+    __avg_opts = None         # Averaged spectrum options, as FDA() keyword arguments (from CLI or config)
+    __multichannel = None     # Analyze all the channels of a file (from CLI or config)
+    __dtype = None            # Floating point type of the signals: "float64", or "float32" if requested (from CLI or config)
+    __load_workers = None     # Number of processes loading the test frequencies of a directory (from CLI or config)
+
+    METRICS_SPECTRA = [ "magn_rms", "magn_db" ] # Derived spectra kept by FDA() objects only loaded for their metrics
 
 
     # Initializers, Loaders and Reloaders
@@ -93,9 +118,38 @@ class AAA():
         self.with_report_ui(with_report_ui)
         self.with_report_file(with_report_file)
         self.view_opts(self.cci().config()["aaa"]["modes"][self.cci().config()["aaa"]["mode_default"]])
+        self.fft_workers(self.cli().fft_workers() if self.cli().fft_workers() is not None else self.cci().config()["common"].get("fft_workers"))
+        self.fft_fast_len(self.cli().fft_fast_len() if self.cli().fft_fast_len() is not None else self.cci().config()["common"].get("fft_fast_len", False))
+        self.dtype("float32" if (self.cli().float32() if self.cli().float32() is not None else self.cci().config()["common"].get("float32", False)) is True else "float64")
+        self.load_workers(self.cli().load_workers() if self.cli().load_workers() is not None else (self.cci().config()["common"].get("load_workers") or os.cpu_count() or 1))
+        self.avg_opts({
+            "avg_size": self.cli().avg_size() if self.cli().avg_size() is not None else self.cci().config()["common"].get("avg_size"),
+            "avg_overlap": self.cli().avg_overlap() if self.cli().avg_overlap() is not None else self.cci().config()["common"].get("avg_overlap", 0.5),
+            "avg_window": self.cli().avg_window() if self.cli().avg_window() is not None else self.cci().config()["common"].get("avg_window", "blackmanharris")
+        })
+        self.multichannel(self.cli().multichannel() if self.cli().multichannel() is not None else self.cci().config()["common"].get("multichannel", False))
+
+        # Out-of-core analysis streams the file in blocks of a bounded size,
+        # so memory doesn't depend on the length of the file
+        if self.cli().out_of_core() is True and self.cli().filename() is not None:
+            self.cli().stream(True)
+
+            if self.cli().blocksize() is None:
+                self.cli().blocksize(self.cci().config()["common"].get("ooc_blocksize", 262144))
 
         self._process()
 
+        # When streaming, the whole file is scanned (block by block) before
+        # the spectrum, averaged over all blocks, is analyzed and rendered
+        if self.cli().stream() is True:
+            if _DEBUG_ENABLE: print("Scanning...")
+
+            while True:
+                try:
+                    self.fda_refresh() # Will also refresh dci, tda and sdf
+                except StopIteration:
+                    break
+
         while True:
             self._analyze()
 
@@ -104,12 +158,12 @@ class AAA():
 
             # If a blocksize was specified in the CLI, the UI should be
             # continuosly rendered based on the specified blocksize
-            if self.cli().blocksize() is not None:
+            if self.cli().blocksize() is not None and self.cli().stream() is not True:
                 self.uip().render(pause = (self.cli().blocksize() / self.cli().fs()))
                 yield
 
                 try:
-                    self.fda().refresh() # Will also refresh dci, tda and sdf
+                    self.fda_refresh() # Will also refresh dci, tda and sdf
                     self.uip().refresh()
                 except StopIteration:
                     break
@@ -232,6 +286,13 @@ class AAA():
         else:
             return self.__fda
 
+    def fda_channels(self, obj = None):
+        if obj is not None:
+            self.__fda_channels = obj
+            return self
+        else:
+            return self.__fda_channels
+
     def fda_multi(self, obj_list = None, idx = None):
         if obj_list is not None:
             self.__fda_multi = obj_list
@@ -241,6 +302,27 @@ class AAA():
         else:
             return self.__fda_multi
 
+    def fda_lru(self, idx_list = None):
+        if idx_list is not None:
+            self.__fda_lru = idx_list
+            return self
+        else:
+            return self.__fda_lru
+
+    def metrics_table(self, table = None):
+        if table is not None:
+            self.__metrics_table = table
+            return self
+        else:
+            return self.__metrics_table
+
+    def sac(self, obj = None):
+        if obj is not None:
+            self.__sac = obj
+            return self
+        else:
+            return self.__sac
+
     def uip(self, obj = None):
         if obj is not None:
             self.__uip = obj
@@ -297,6 +379,48 @@ class AAA():
         else:
             return self.__view_opts
 
+    def fft_workers(self, n = None):
+        if n is not None:
+            self.__fft_workers = n
+            return self
+        else:
+            return self.__fft_workers
+
+    def fft_fast_len(self, status = None):
+        if status is not None:
+            self.__fft_fast_len = status
+            return self
+        else:
+            return self.__fft_fast_len
+
+    def dtype(self, dtype = None):
+        if dtype is not None:
+            self.__dtype = dtype
+            return self
+        else:
+            return self.__dtype
+
+    def load_workers(self, n = None):
+        if n is not None:
+            self.__load_workers = n
+            return self
+        else:
+            return self.__load_workers
+
+    def avg_opts(self, opts = None):
+        if opts is not None:
+            self.__avg_opts = opts
+            return self
+        else:
+            return self.__avg_opts
+
+    def multichannel(self, status = None):
+        if status is not None:
+            self.__multichannel = status
+            return self
+        else:
+            return self.__multichannel
+
 
     # Processors and Pre-Processors
 
@@ -307,7 +431,7 @@ class AAA():
 
             # Process input file
             if _DEBUG_ENABLE: print("Processing Signal Data File...")
-            self.sdf(SDF(self.cli().filename(), ftype = self.cli().filetype(), fs = self.cli().fs(), bit_depth = self.cli().bit_depth(), blocksize = self.cli().blocksize()))
+            self.sdf(SDF(self.cli().filename(), ftype = self.cli().filetype(), fs = self.cli().fs(), bit_depth = self.cli().bit_depth(), blocksize = self.cli().blocksize(), multichannel = self.multichannel() is True, dtype = self.dtype()))
 
             # Process Time Domain
             if _DEBUG_ENABLE: print("Processing Time Domain Analyzer...")
@@ -315,7 +439,22 @@ class AAA():
 
             # Process Frequency Domain
             if _DEBUG_ENABLE: print("Processing Frequency Domain Analyzer...")
-            self.fda(FDA(self.tda(), self.dci(), freq_start = self.freq_start(), freq_stop = self.freq_stop()))
+            if self.cli().stream() is True:
+                if self.cli().blocksize() is None:
+                    raise Exception("Streaming requires a blocksize.")
+
+                # Unless requested otherwise, average segments of a block size
+                if self.avg_opts()["avg_size"] is None:
+                    self.avg_opts()["avg_size"] = self.cli().blocksize()
+
+            self.fda(FDA(self.tda(), self.dci(), freq_start = self.freq_start(), freq_stop = self.freq_stop(), fft_workers = self.fft_workers(), fft_fast_len = self.fft_fast_len(), stream = self.cli().stream() is True, **self.avg_opts()))
+
+            # All the channels of a multi-channel file are analyzed at once,
+            # while the first one is reported (plotted)
+            if self.multichannel() is True:
+                self.fda_channels(self.fda())
+                self.fda(self.fda_channels().channel(0))
+                self.tda(self.fda().tda())
         elif self.cli().directory() is not None:
             # Enable events
             self.eqi().enabled(True)
@@ -326,18 +465,85 @@ class AAA():
             if self.freq_base() not in self.cci().config()["common"]["test_freqs"]:
                 self.freq_base(self.cci().freq_nearest(self.freq_base()))
 
-            fda_multi = []
+            # Spectra and metrics of unchanged captures are reused from the
+            # cache of previous runs. The cache lives in the user's cache
+            # directory by default, so that capture directories (possibly
+            # read-only or shared) are left untouched; relative paths are
+            # taken from the capture directory.
+            self.sac(SAC(
+                os.path.join(self.cli().directory(), os.path.expanduser(self.cci().config()["common"].get("cache_dir", "~/.cache/uaa"))),
+                enabled = self.cli().no_cache() is not True and self.cci().config()["common"].get("cache", True) is True
+            ))
+
+            freqs = self.cci().config()["common"]["test_freqs"]
+
+            fda_multi = [ None ] * len(freqs)
+            metrics_multi = [ None ] * len(freqs)
+
+            keys = [ self.sac().key(self.multi_filename(f), self.dci(), self.cache_params()) for f in freqs ]
+
+            # Test frequencies other than the base frequency, with no cached
+            # metrics, are loaded by a pool of processes. Meanwhile, the
+            # base frequency is loaded by this process.
+            pending = [ i for i, f in enumerate(freqs) if f != self.freq_base() and self.sac().metrics(keys[i]) is None ]
+
+            pool = None
+            results = []
+            shared = set()
+
+            if self.load_workers() > 1 and len(pending) > 1:
+                if _DEBUG_ENABLE: print("Analyzing %d frequencies with %d processes..." % (len(pending), min(self.load_workers(), len(pending))))
+
+                # NOTE: Shared memory blocks are created by the workers and
+                #       unlinked by this process, so both must report to the
+                #       same resource tracker, which must already be running
+                #       when the workers are forked.
+                resource_tracker.ensure_running()
+
+                pool = multiprocessing.Pool(processes = min(self.load_workers(), len(pending)))
+            else:
+                pending = []
 
-            for f in self.cci().config()["common"]["test_freqs"]:
-                if _DEBUG_ENABLE: print("Analyzing frequency: %d Hz" % f)
+            try:
+                # NOTE: Each frequency is a task of its own, so that the
+                #       results of the others are still known (and their
+                #       shared memory blocks unlinked) when one fails.
+                if pool is not None:
+                    results = [ pool.apply_async(AAA._process_worker, (self._process_worker_args(freqs[i], keys[i]),)) for i in pending ]
 
-                sdf = SDF(self.cli().directory() + ("/l_%d.%s" % (f, self.cli().filetype())), ftype = self.cli().filetype(), fs = self.cli().fs(), bit_depth = self.cli().bit_depth())
+                for i, f in enumerate(freqs):
+                    if i in pending:
+                        continue
 
-                tda = TDA(sdf, self.dci(), periods = False if f != self.freq_base() else True)
+                    if _DEBUG_ENABLE: print("Analyzing frequency: %d Hz" % f)
 
-                fda_multi.append(FDA(tda, self.dci(), freq_start = self.freq_start(), freq_stop = self.freq_stop()))
+                    # Only the base frequency is fully loaded. Only the metrics
+                    # of the others are kept, until they are selected.
+                    fda_multi[i], metrics_multi[i] = self._process_multi(f, keys[i], full = f == self.freq_base())
+
+                for i, r in zip(pending, results):
+                    shared.add(i)
+
+                    metrics_multi[i] = self._process_shared(keys[i], *r.get())
+            finally:
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+
+                    # On errors, the shared memory blocks of the results that
+                    # weren't processed would otherwise be left behind,
+                    # whichever result failed
+                    for i, r in zip(pending, results):
+                        if i not in shared and r.ready() and r.successful():
+                            self._process_unshare(r.get()[1])
 
             self.fda_multi(fda_multi)
+            self.fda_lru([ freqs.index(self.freq_base()) ])
+            self.metrics_table(self.tabulate(freqs, metrics_multi))
+
+            # Record the fingerprints and metrics of new or changed captures,
+            # so that the next run only analyzes captures changed since.
+            self.sac().sync()
         else:
             raise Exception("No file or directory was specified to be processed.")
 
@@ -346,6 +552,98 @@ class AAA():
         if render is True:
             self.uip(UIP(self.dci(), self.eqi()))
 
+    def _process_multi(self, freq, key, full = True):
+        filename = self.multi_filename(freq)
+
+        metrics = self.sac().metrics(key)
+
+        if metrics is not None and full is False:
+            return None, metrics
+
+        spectrum = self.sac().spectrum(key) if metrics is not None else None
+
+        sdf = SDF(filename, ftype = self.cli().filetype(), fs = self.cli().fs(), bit_depth = self.cli().bit_depth(), dtype = self.dtype())
+
+        tda = TDA(sdf, self.dci(), periods = False if freq != self.freq_base() else True)
+
+        # If only the metrics are needed, the FDA() object is discarded
+        # right after, so only the derived spectra they use are kept.
+        fda = FDA(tda, self.dci(), freq_start = self.freq_start(), freq_stop = self.freq_stop(), fft_workers = self.fft_workers(), fft_fast_len = self.fft_fast_len(), spectra = None if full is True else self.METRICS_SPECTRA, spectrum = spectrum, **self.avg_opts())
+
+        if spectrum is None:
+            metrics = self.metrics(fda)
+
+            self.sac().store(key, fda.spectrum_fft(), metrics)
+
+        return fda if full is True else None, metrics
+
+    def _process_worker_args(self, freq, key):
+        # NOTE: Only plain data is sent to the workers. Each one uses a single
+        #       FFT thread, as the pool already keeps all the CPUs busy.
+        fda_opts = dict(freq_start = self.freq_start(), freq_stop = self.freq_stop(), fft_workers = 1, fft_fast_len = self.fft_fast_len(), spectra = self.METRICS_SPECTRA, **self.avg_opts())
+
+        return ( self.multi_filename(freq), self.cli().filetype(), self.cli().fs(), self.cli().bit_depth(), self.dtype(), self.dci().cal_data(), fda_opts, key is not None )
+
+    @staticmethod
+    def _process_worker(args):
+        filename, ftype, fs, bit_depth, dtype, cal_data, fda_opts, share = args
+
+        dci = DCI(cal_data = dict(cal_data))
+
+        sdf = SDF(filename, ftype = ftype, fs = fs, bit_depth = bit_depth, dtype = dtype)
+
+        fda = FDA(TDA(sdf, dci, periods = False), dci, **fda_opts)
+
+        # Only the metrics are sent back. The spectrum, if needed (to be
+        # cached), is copied to a shared memory block instead of being
+        # pickled.
+        if share is not True:
+            return AAA.metrics(fda), None, None, None
+
+        spectrum = fda.spectrum_fft()
+
+        shm = shared_memory.SharedMemory(create = True, size = max(1, spectrum.nbytes))
+
+        view = np.ndarray(spectrum.shape, dtype = spectrum.dtype, buffer = shm.buf)
+        view[:] = spectrum
+        del view
+
+        shm.close()
+
+        return AAA.metrics(fda), shm.name, spectrum.shape, spectrum.dtype.str
+
+    def _process_shared(self, key, metrics, name, shape, dtype):
+        if name is None:
+            return metrics
+
+        shm = shared_memory.SharedMemory(name = name)
+
+        try:
+            spectrum = np.ndarray(shape, dtype = np.dtype(dtype), buffer = shm.buf)
+
+            self.sac().store(key, spectrum, metrics)
+
+            del spectrum
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return metrics
+
+    def _process_unshare(self, name):
+        # Unlinks the shared memory block 'name' of a result that won't be
+        # processed (see _process_worker())
+        if name is None:
+            return
+
+        try:
+            shm = shared_memory.SharedMemory(name = name)
+        except FileNotFoundError:
+            return
+
+        shm.close()
+        shm.unlink()
+
     def _analyze(self):
         if self.cli().filename() is not None:
             self._analyze_single()
@@ -364,7 +662,31 @@ class AAA():
     def _analyze_multi(self):
         # Set the current FDA, SDF and TDA objects to be analyzed, based
         # on the selected base frequency.
-        self.fda(self.fda_multi(idx = self.cci().config()["common"]["test_freqs"].index(self.freq_base())))
+        idx = self.cci().config()["common"]["test_freqs"].index(self.freq_base())
+
+        if self.fda_multi(idx = idx) is None:
+            fda, metrics = self._process_multi(self.freq_base(), self.sac().key(self.multi_filename(self.freq_base()), self.dci(), self.cache_params()))
+
+            self.fda_multi()[idx] = fda
+
+            # The capture may have changed since the table was calculated
+            row = self.tabulate([ self.freq_base() ], [ metrics ])
+
+            for k in self.metrics_table():
+                self.metrics_table()[k][idx] = row[k][0]
+
+            self.sac().sync()
+
+        # Only the most recently selected FDA() objects are kept loaded
+        if idx in self.fda_lru():
+            self.fda_lru().remove(idx)
+
+        self.fda_lru().append(idx)
+
+        while len(self.fda_lru()) > max(1, self.cci().config()["aaa"].get("fda_multi_size", 4)):
+            self.fda_multi()[self.fda_lru().pop(0)] = None
+
+        self.fda(self.fda_multi(idx = idx))
         self.sdf(self.fda().tda().sdf())
         self.tda(self.fda().tda())
 
@@ -378,6 +700,69 @@ class AAA():
             self.report_ui(multi = True)
 
 
+    # Extractors
+
+    @staticmethod
+    def metrics(fda):
+        # Metrics of each test frequency, as plotted by report_ui(multi = True)
+        #
+        # NOTE: Metrics are plain floats (e.g. not np.float32, with float32
+        #       signals), so they can be cached as json.
+        return {
+            "high": float(fda.high()),
+            "sfdr": float(fda.sfdr()),
+            "thd": float(fda.thd(in_dB = True)),
+            "thdn": float(fda.thdn(in_dB = True)),
+            "snr": float(fda.snr())
+        }
+
+
+    # Calculators
+
+    def tabulate(self, freqs, metrics_list):
+        # The curves plotted by report_ui(multi = True), calculated once per
+        # load, so that re-rendering (e.g. on view mode events) only reads
+        # them.
+        high = np.array([ m["high"] for m in metrics_list ])
+
+        return {
+            "freq": np.array(freqs),
+            "fr": high,
+            "sfdr": high - np.array([ m["sfdr"] for m in metrics_list ]),
+            "thd": high - np.array([ m["thd"] for m in metrics_list ]),
+            "thdn": high - np.array([ m["thdn"] for m in metrics_list ]),
+            "snr": high - np.array([ m["snr"] for m in metrics_list ])
+        }
+
+
+    # Helpers
+
+    def multi_filename(self, freq):
+        return os.path.join(self.cli().directory(), "l_%d.%s" % (freq, self.cli().filetype()))
+
+    def cache_params(self):
+        # Every parameter that changes the spectrum or the metrics of a
+        # capture, so that changing any of them invalidates the cache
+        return dict(
+            filetype = self.cli().filetype(),
+            fs = self.cli().fs(),
+            bit_depth = self.cli().bit_depth(),
+            freq_start = self.freq_start(),
+            freq_stop = self.freq_stop(),
+            fft_fast_len = self.fft_fast_len(),
+            dtype = self.dtype(),
+            **self.avg_opts()
+        )
+
+    def fda_refresh(self):
+        # Reads the next block. Multi-channel files are refreshed as a whole,
+        # which also refreshes the FDA() object of each channel.
+        if self.fda_channels() is not None:
+            self.fda_channels().refresh()
+        else:
+            self.fda().refresh()
+
+
     # Reporting
 
     def report_file(self, multi = False):
@@ -396,10 +781,10 @@ class AAA():
                 "Channels": (self.tda().channels(), ''),
                 "Bit Depth": (self.tda().bit_depth() if self.tda().bit_depth() else "N/A", "bits" if self.tda().bit_depth() else ""),
                 "FS": (self.tda().fs(), "Hz"),
-                "Length": ("%.2f (%.2f)" % (self.tda().length(), self.tda().length_unpadded()), "secs"),
+                "Length": ("%.2f (%.2f)" % (self.tda().length(), self.tda().length_unpadded()), "secs") if self.fda().stream() is not True else ("%.2f" % self.tda().length_running(), "secs"),
                 "Carrier": ("%.2f" % self.fda().carrier(), "Hz"),
-                "High / Low": ("%.1f / %.1f" % (self.fda().spectrum_magn_db().max(), self.fda().spectrum_magn_db().min()), self.dci().log_unit()),
-                "Peak / RMS": ("%.3f / %.3f" % (self.fda().tda().vpeak(), self.fda().tda().vrms()), 'V'),
+                "High / Low": ("%.1f / %.1f" % (self.fda().high(), self.fda().low()), self.dci().log_unit()),
+                "Peak / RMS": ("%.3f / %.3f" % (self.fda().tda().vpeak(), self.fda().tda().vrms()), 'V') if self.fda().stream() is not True else ("%.3f / %.3f" % (self.tda().peak_running() / self.dci().nrms(), self.tda().rms_running() / self.dci().nrms()), 'V'),
                 "Noise Floor": ("%.2f" % self.fda().noise_floor(), self.dci().log_unit()),
                 "PN@%dHz" % self.fda().pn()[0][0]: ("%.2f" % self.fda().pn()[0][1], "dBc/Hz"),
                 "PN@%dHz" % self.fda().pn()[1][0]: ("%.2f" % self.fda().pn()[1][1], "dBc/Hz"),
@@ -420,34 +805,38 @@ class AAA():
             }
 
             if _DEBUG_ENABLE:
-                print("count: %d, min: %d, avg: %.8f, max: %d" % self.tda().period_cmam())
+                cmam = self.tda().period_cmam() if self.fda().stream() is not True else self.tda().period_cmam_running()
+
+                if cmam is not None and cmam[0] > 0:
+                    print("count: %d, min: %d, avg: %.8f, max: %d" % cmam)
+                else:
+                    print("count: 0 (no full periods)")
 
                 for k in measurements:
                     print("%s: %s %s" % (k, measurements[k][0], measurements[k][1]))
 
+                if self.fda_channels() is not None:
+                    fda = self.fda_channels()
+
+                    for c, m in enumerate(zip(fda.metric("thdn", in_dB = True), fda.metric("thd", in_dB = True), fda.metric("snr"), fda.metric("sfdr"))):
+                        print("Channel %d: THD+N: %.2f dB, THD: %.2f dB, SNR: %.2f dB, SFDR: %.2f dBc" % ((c,) + m))
+
         # Plot FR, FFTNF, SFDR, THD, THD+N, SNR and RMS values on the chart
         if _DEBUG_ENABLE: print("Plotting metrics...")
 
         if multi is True:
-            fr = []
-            sfdr = []
-            thd = []
-            thdn = []
-            snr = []
-
-            for fda in self.fda_multi():
-                fr.append(fda.spectrum_magn_db().max())
-                sfdr.append(fda.spectrum_magn_db().max() - fda.sfdr())
-                thd.append(fda.spectrum_magn_db().max() - fda.thd(in_dB = True))
-                thdn.append(fda.spectrum_magn_db().max() - fda.thdn(in_dB = True))
-                snr.append(fda.spectrum_magn_db().max() - fda.snr())
-
-            x = self.cci().config()["common"]["test_freqs"]
-        else:
-            sfdr = [ self.fda().spectrum_magn_db().max() - self.fda().sfdr() ] * 2
-            thd = [ self.fda().spectrum_magn_db().max() - self.fda().thd(in_dB = True) ] * 2
-            thdn = [ self.fda().spectrum_magn_db().max() - self.fda().thdn(in_dB = True) ] * 2
-            snr = [ self.fda().spectrum_magn_db().max() - self.fda().snr() ] * 2
+            fr = self.metrics_table()["fr"]
+            sfdr = self.metrics_table()["sfdr"]
+            thd = self.metrics_table()["thd"]
+            thdn = self.metrics_table()["thdn"]
+            snr = self.metrics_table()["snr"]
+
+            x = self.metrics_table()["freq"]
+        else:
+            sfdr = [ self.fda().high() - self.fda().sfdr() ] * 2
+            thd = [ self.fda().high() - self.fda().thd(in_dB = True) ] * 2
+            thdn = [ self.fda().high() - self.fda().thdn(in_dB = True) ] * 2
+            snr = [ self.fda().high() - self.fda().snr() ] * 2
 
             x = [ self.fda().freq_start(), self.fda().freq_stop() ]
 
@@ -455,8 +844,14 @@ class AAA():
         # Calculate plot limits
 
         if "fdm" in self.view_opts():
-            pmin = 20 * (np.log10(self.fda().spectrum_magn_rms().min()) - 1)
-            pmax = 20 * (np.abs(np.log10(self.fda().spectrum_magn_rms().min())) + 1)
+            # NOTE: Bins may be exactly zero (e.g. on single precision
+            #       spectra), so the limits are set by the lowest non-zero
+            #       magnitude.
+            magn = self.fda().spectrum_magn_rms()
+            low = magn[magn > 0].min() if (magn > 0).any() else np.finfo(magn.dtype).tiny
+
+            pmin = 20 * (np.log10(low) - 1)
+            pmax = 20 * (np.abs(np.log10(low)) + 1)
         else:
             margin = 0.075
             pmin = np.inf if "fftnf" not in self.view_opts() else self.fda().noise_floor() + (self.fda().noise_floor() * (margin / 2.))
@@ -25,13 +25,21 @@ import os
 #
 # import core interfaces
 #
+#  - Advanced Linux Sound Architecture backend (ALSA)
 #  - Frequency Domain Analyzer (FDA)
 #  - Loopback Signal Path (LSP)
 #  - Signal Data File (SDF)
+#  - Simulated Loopback (SLB)
 #  - Sine Wave Generator (SWG)
 #  - Time Domain Analyzer (TDA)
 #
-from uaa_core import FDA, LSP, SDF, SWG, TDA
+from uaa_core import ALSA, FDA, LSP, SDF, SLB, SWG, TDA
+
+
+try:
+    _DEBUG_ENABLE
+except NameError:
+    _DEBUG_ENABLE = True
 
 
 class AAM():
@@ -45,12 +53,14 @@ class AAM():
     __cli = None        # CLI() object
     __dci = None        # DCI() object
     __tmp_dir = None    # temporary file storage location (directory path)
+    __cci = None        # CCI() object (optional)
+    __backend = None    # Audio I/O backend of LSP() objects: ALSA() or SLB()
 
 
     # Initializers, Loaders and Reloaders
 
-    def __init__(self, cli, dci, tmp_dir = "/tmp"):
-        self.__init_args = [ cli, dci, tmp_dir ]
+    def __init__(self, cli, dci, tmp_dir = "/tmp", cci = None):
+        self.__init_args = [ cli, dci, tmp_dir, cci ]
 
         self.__refresh = self.load(*self.__init_args)
 
@@ -59,25 +69,50 @@ class AAM():
         except StopIteration:
             pass
 
-    def load(self, cli, dci, tmp_dir = "/tmp"):
+    def load(self, cli, dci, tmp_dir = "/tmp", cci = None):
         self.cli(cli)
         self.dci(dci)
         self.tmp_dir(tmp_dir)
+        self.cci(cci)
+
+        config = self.cci().config() if self.cci() is not None else {}
+
+        # FFT and precision options are taken from the CLI or, if not set
+        # there, from the configuration (see AAA())
+        fft_workers = self.cli().fft_workers() if self.cli().fft_workers() is not None else config.get("common", {}).get("fft_workers")
+        fft_fast_len = self.cli().fft_fast_len() if self.cli().fft_fast_len() is not None else config.get("common", {}).get("fft_fast_len", False)
+        float32 = self.cli().float32() if self.cli().float32() is not None else config.get("common", {}).get("float32", False)
+
+        if (self.cli().loopback() or config.get("lsp", {}).get("backend", "alsa")) == "sim":
+            self.backend(SLB(**config.get("lsp", {}).get("sim", {})))
+        else:
+            self.backend(ALSA())
+
+        # See AAT() for the latency detection
+        latency = None
+
+        if config.get("lsp", {}).get("latency_detect", True) is True:
+            try:
+                latency = LSP(backend = self.backend()).latency_detect(latency_max = config.get("lsp", {}).get("latency_max", 1.))
+            except Exception as e:
+                if _DEBUG_ENABLE: print("%s Using a fixed I/O delay." % e)
 
         print("Press 'Ctrl+C' to exit...")
 
         while True:
             try:
                 swg = SWG("%s/s_aam_test_%d.wav" % (self.tmp_dir(), self.cli().freq_base()), freqs = [ self.cli().freq_base() ], amplitudes = [ 1 ], length = 3.)
-                lsp = LSP("%s/s_aam_test_%d.wav" % (self.tmp_dir(), self.cli().freq_base()), "%s/l_aam_test_%d.raw" % (self.tmp_dir(), self.cli().freq_base()), standalone = True, io_delay = 0.75, length = 1)
+                # The capture is kept in memory (no destination file), and
+                # handed to SDF() as is
+                lsp = LSP("%s/s_aam_test_%d.wav" % (self.tmp_dir(), self.cli().freq_base()), None, standalone = True, io_delay = 0.75, length = 1, backend = self.backend(), latency = latency, settle = config.get("lsp", {}).get("settle", 0.1))
 
-                sdf = SDF("%s/l_aam_test_%d.raw" % (self.tmp_dir(), self.cli().freq_base()), ftype = "raw", fs = 48000, bit_depth = 24)
+                sdf = SDF(None, ftype = "raw", fs = 48000, bit_depth = 24, dtype = "float32" if float32 is True else "float64", buffer = lsp.capture())
                 tda = TDA(sdf, dci, periods = False)
-                fda = FDA(tda, dci)
+                fda = FDA(tda, dci, fft_workers = fft_workers, fft_fast_len = fft_fast_len, avg_size = self.cli().avg_size(), avg_overlap = self.cli().avg_overlap() if self.cli().avg_overlap() is not None else 0.5, avg_window = self.cli().avg_window() if self.cli().avg_window() is not None else "blackmanharris", spectra = [ "magn_rms", "magn_db" ])
             except KeyboardInterrupt:
                 break
 
-            print("dBFS: %.2f" % fda.spectrum_magn_db().max())
+            print("dBFS: %.2f" % fda.high())
             print("Vrms: %.5f" % tda.vrms())
             print("Vpeak: %.5f" % tda.vpeak())
             print("SNR: %.2f" % fda.snr())
@@ -88,7 +123,6 @@ class AAM():
         # Cleanup
         try:
             os.unlink("%s/s_aam_test_%d.wav" % (self.tmp_dir(), self.cli().freq_base()))
-            os.unlink("%s/l_aam_test_%d.raw" % (self.tmp_dir(), self.cli().freq_base()))
         except Exception as e:
             raise Exception("Unable to cleanup temporary files: %s" % e)
 
@@ -136,4 +170,18 @@ class AAM():
         else:
             return self.__tmp_dir
 
+    def cci(self, obj = None):
+        if obj is not None:
+            self.__cci = obj
+            return self
+        else:
+            return self.__cci
+
+    def backend(self, obj = None):
+        if obj is not None:
+            self.__backend = obj
+            return self
+        else:
+            return self.__backend
+
 
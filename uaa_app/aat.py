@@ -20,15 +20,22 @@
 #
 
 
+import json
 import os
 
+import numpy as np
+
 #
 # import core interfaces
 #
+#  - Advanced Linux Sound Architecture backend (ALSA)
 #  - Loopback Signal Path (LSP)
+#  - Signal Data File (SDF)
+#  - Simulated Loopback (SLB)
+#  - Sine Sweep Analyzer (SSA)
 #  - Sine Wave Generator (SWG)
 #
-from uaa_core import LSP, SWG
+from uaa_core import ALSA, LSP, SDF, SLB, SSA, SWG
 
 
 try:
@@ -47,6 +54,9 @@ class AAT():
 
     __cli = None        # CLI() object
     __cci = None        # CCI() object
+    __backend = None    # Audio I/O backend of LSP() objects: ALSA() or SLB()
+
+    ESS_TAIL = 0.5      # Time captured after the end of an exponential sine sweep (seconds; decay of the response)
 
 
     # Initializers, Loaders and Reloaders
@@ -65,13 +75,48 @@ class AAT():
         self.cli(cli)
         self.cci(cci)
 
+        if (self.cli().loopback() or self.cci().config().get("lsp", {}).get("backend", "alsa")) == "sim":
+            self.backend(SLB(**self.cci().config().get("lsp", {}).get("sim", {})))
+        else:
+            self.backend(ALSA())
+
         if not os.path.isdir(self.cli().directory()):
             try:
                 os.makedirs(self.cli().directory(), exist_ok = True)
             except Exception as e:
                 raise Exception("Failed to create directory: %s" % e)
 
+        config = self.cci().config().get("lsp", {})
+
+        # The round-trip latency is measured once, so each capture starts as
+        # soon as the signal is present, instead of after a fixed delay
+        latency = None
+
+        if config.get("latency_detect", True) is True:
+            try:
+                latency = LSP(backend = self.backend()).latency_detect(latency_max = config.get("latency_max", 1.))
+
+                if _DEBUG_ENABLE: print("Round-trip latency: %.1f ms" % (latency * 1000.))
+            except Exception as e:
+                if _DEBUG_ENABLE: print("%s Using a fixed I/O delay." % e)
+
+        sweep = self.cli().sweep() or self.cci().config().get("aat", {}).get("sweep", "discrete")
+
         while True:
+            if sweep == "stepped":
+                self._process_stepped([ f for f in self.cci().config()["common"]["test_freqs"] if f >= freq_start and f <= freq_stop ], latency)
+
+                yield
+
+                continue
+
+            if sweep == "ess":
+                self._process_ess(latency)
+
+                yield
+
+                continue
+
             for f in self.cci().config()["common"]["test_freqs"]:
                 if f < freq_start:
                     continue
@@ -81,7 +126,7 @@ class AAT():
 
                 if _DEBUG_ENABLE: print("Testing frequency: %d Hz" % f)
                 swg = SWG("%s/s_%s.wav" % (self.cli().directory(), f), freqs = [ f ], amplitudes = [ 1 ], length = 5.)
-                lsp = LSP("%s/s_%s.wav" % (self.cli().directory(), f), "%s/l_%s.raw" % (self.cli().directory(), f), standalone = True, io_delay = 1.15)
+                lsp = LSP("%s/s_%s.wav" % (self.cli().directory(), f), "%s/l_%s.raw" % (self.cli().directory(), f), standalone = True, io_delay = 1.15, backend = self.backend(), latency = latency, settle = config.get("settle", 0.1))
 
             yield
 
@@ -122,4 +167,120 @@ class AAT():
         else:
             return self.__cci
 
+    def backend(self, obj = None):
+        if obj is not None:
+            self.__backend = obj
+            return self
+        else:
+            return self.__backend
+
+
+    # Processors and Pre-Processors
+
+    def _process_stepped(self, freqs, latency):
+        # Stepped sine sweep: a single stimulus holds all the frequencies,
+        # one after another, and is captured in a single pass (in memory).
+        # The capture is then split into the usual l_<freq>.raw files, so
+        # directory analysis works the same way for both sweep modes.
+        #
+        # NOTE: Each step is 'step_length' seconds long. The first
+        #       'step_settle' seconds of each step are skipped (transient),
+        #       and the next 'step_capture' seconds are kept.
+        config = self.cci().config().get("aat", {})
+
+        step_length = config.get("step_length", 2.5)
+        step_settle = config.get("step_settle", 0.25)
+        step_capture = config.get("step_capture", 2)
+
+        if step_settle + step_capture > step_length:
+            raise Exception("Invalid stepped sweep: 'step_settle' plus 'step_capture' exceeds 'step_length'.")
+
+        # The steps are located through the round-trip latency, as the
+        # capture starts along with the playback
+        if latency is None:
+            raise Exception("The stepped sweep requires the round-trip latency to be measured (see 'lsp.latency_detect').")
+
+        if _DEBUG_ENABLE: print("Testing frequencies (stepped sweep): %d Hz to %d Hz" % (freqs[0], freqs[-1]))
 
+        swg = SWG("%s/s_sweep.wav" % self.cli().directory(), freqs = freqs, amplitudes = [ 1 ] * len(freqs), length = step_length, steps = True)
+        lsp = LSP("%s/s_sweep.wav" % self.cli().directory(), None, length = int(np.ceil(len(freqs) * step_length + latency)), standalone = True, io_delay = 0., backend = self.backend())
+
+        # Raw data is split at frame boundaries (S24_3LE), with no decoding
+        data = lsp.capture()
+        width = 3 * lsp.channels()
+
+        for i, f in enumerate(freqs):
+            start = int(round((i * step_length + step_settle + latency) * lsp.fs()))
+            end = start + int(step_capture * lsp.fs())
+
+            if end * width > data.size:
+                raise Exception("Incomplete stepped sweep capture (%d Hz)." % f)
+
+            self.io_write("%s/l_%s.raw" % (self.cli().directory(), f), data[start * width:end * width])
+
+
+    def _process_ess(self, latency):
+        # Exponential sine sweep: a single capture, a few seconds long,
+        # holds the frequency response (magnitude and phase) and the
+        # harmonic distortion of each order over the whole band of the
+        # sweep (see SSA()). The raw capture is kept as l_ess.raw, and the
+        # responses are written to ess.json.
+        config = self.cci().config().get("aat", {})
+
+        freqs = config.get("ess_freqs", [ 5, 22000 ])
+        length = config.get("ess_length", 5.)
+
+        if _DEBUG_ENABLE: print("Testing frequencies (exponential sine sweep): %d Hz to %d Hz" % (freqs[0], freqs[1]))
+
+        swg = SWG("%s/s_ess.wav" % self.cli().directory(), freqs = freqs, amplitudes = [ 1 ], length = length, sweep = True)
+
+        # The capture starts along with the playback, so it must hold the
+        # whole sweep, delayed by the latency (if unknown, the fixed I/O
+        # delay is assumed), and the decay of the response
+        lsp = LSP("%s/s_ess.wav" % self.cli().directory(), None, length = int(np.ceil(length + (latency if latency is not None else 1.15) + self.ESS_TAIL)), standalone = True, io_delay = 0., backend = self.backend())
+
+        self.io_write("%s/l_ess.raw" % self.cli().directory(), lsp.capture())
+
+        ssa = SSA(SDF(None, ftype = "raw", fs = lsp.fs(), bit_depth = 24, buffer = lsp.capture()), swg, orders = config.get("ess_orders", 5))
+
+        self.io_write_ess("%s/ess.json" % self.cli().directory(), ssa)
+
+        if _DEBUG_ENABLE:
+            print("%10s %10s %10s %10s %10s %10s" % ("Freq (Hz)", "FR (dB)", "Phase (o)", "THD (dB)", "H2 (dB)", "H3 (dB)"))
+
+            for f in self.cci().config()["common"]["test_freqs"]:
+                if f < ssa.freqs()[0] or f > ssa.freqs()[-1]:
+                    continue
+
+                i = int(np.argmin(np.abs(ssa.freqs() - f)))
+
+                print("%10d %10.2f %10.2f %10.2f %10.2f %10.2f" % (f, ssa.fr()[i], np.degrees(ssa.phase()[i]), ssa.thd()[i], ssa.hd(2)[i], ssa.hd(3)[i]))
+
+
+    # I/O
+
+    def io_write_ess(self, filename, ssa):
+        # NaN (not measured) values are written as null
+        values = lambda a: [ None if np.isnan(v) else float(v) for v in a ]
+
+        data = {
+            "freqs": values(ssa.freqs()),
+            "fr": values(ssa.fr()),
+            "phase": values(ssa.phase()),
+            "thd": values(ssa.thd()),
+            "hd": { str(k): values(ssa.hd(k)) for k in range(2, ssa.orders() + 1) },
+            "latency": ssa.latency()
+        }
+
+        try:
+            with open(filename, "w") as f:
+                f.write(json.dumps(data))
+        except Exception as e:
+            raise Exception("Unable to write to file %s: %s" % (filename, e))
+
+    def io_write(self, filename, data):
+        try:
+            with open(filename, "wb") as f:
+                f.write(data.tobytes())
+        except Exception as e:
+            raise Exception("Unable to write to file %s: %s" % (filename, e))
@@ -25,11 +25,13 @@ import os
 #
 # import core interfaces
 #
+#  - Advanced Linux Sound Architecture backend (ALSA)
 #  - Loopback Signal Path (LSP)
 #  - Signal Data File (SDF)
+#  - Simulated Loopback (SLB)
 #  - Sine Wave Generator (SWG)
 #
-from uaa_core import LSP, SDF, SWG
+from uaa_core import ALSA, LSP, SDF, SLB, SWG
 
 
 class AIC():
@@ -42,12 +44,14 @@ class AIC():
 
     __cli = None        # CLI() object
     __tmp_dir = None    # temporary file storage location (directory path)
+    __cci = None        # CCI() object (optional)
+    __backend = None    # Audio I/O backend of LSP() objects: ALSA() or SLB()
 
 
     # Initializers, Loaders and Reloaders
 
-    def __init__(self, cli, tmp_dir = "/tmp"):
-        self.__init_args = [ cli, tmp_dir ]
+    def __init__(self, cli, tmp_dir = "/tmp", cci = None):
+        self.__init_args = [ cli, tmp_dir, cci ]
 
         self.__refresh = self.load(*self.__init_args)
 
@@ -56,9 +60,17 @@ class AIC():
         except StopIteration:
             pass
 
-    def load(self, cli, tmp_dir = "/tmp"):
+    def load(self, cli, tmp_dir = "/tmp", cci = None):
         self.cli(cli)
         self.tmp_dir(tmp_dir)
+        self.cci(cci)
+
+        config = self.cci().config() if self.cci() is not None else {}
+
+        if (self.cli().loopback() or config.get("lsp", {}).get("backend", "alsa")) == "sim":
+            self.backend(SLB(**config.get("lsp", {}).get("sim", {})))
+        else:
+            self.backend(ALSA())
 
         cal_data = {}
 
@@ -119,6 +131,20 @@ class AIC():
         else:
             return self.__tmp_dir
 
+    def cci(self, obj = None):
+        if obj is not None:
+            self.__cci = obj
+            return self
+        else:
+            return self.__cci
+
+    def backend(self, obj = None):
+        if obj is not None:
+            self.__backend = obj
+            return self
+        else:
+            return self.__backend
+
 
     # Stages
 
@@ -132,7 +158,7 @@ class AIC():
             return
 
         swg = SWG("%s/s_cal_%d.wav" % (self.tmp_dir(), self.cli().freq_base()), freqs = [ self.cli().freq_base() ], amplitudes = [ 1 ], length = 5.)
-        lsp = LSP("%s/s_cal_%d.wav" % (self.tmp_dir(), self.cli().freq_base()))
+        lsp = LSP("%s/s_cal_%d.wav" % (self.tmp_dir(), self.cli().freq_base()), backend = self.backend())
 
         print("\n => Adjust the signal level to match %s, then press Ctrl+C" % input_type_str)
 
@@ -150,7 +176,7 @@ class AIC():
 
         print("\n => Wait a few seconds while calibration signal is being recorded...")
 
-        lsp = LSP("%s/s_cal_%d.wav" % (self.tmp_dir(), self.cli().freq_base()), "%s/d_cal_%d.raw" % (self.tmp_dir(), self.cli().freq_base()), standalone = True)
+        lsp = LSP("%s/s_cal_%d.wav" % (self.tmp_dir(), self.cli().freq_base()), "%s/d_cal_%d.raw" % (self.tmp_dir(), self.cli().freq_base()), standalone = True, backend = self.backend())
 
     def stage_process_signal(self):
         sdf = SDF("%s/d_cal_%d.raw" % (self.tmp_dir(), self.cli().freq_base()), ftype = "raw", fs = 48000, bit_depth = 24)
@@ -20,10 +20,14 @@
 #
 
 
+from .alsa import ALSA
 from .eqi import EQI
 from .fda import FDA
 from .lsp import LSP
+from .sac import SAC
 from .sdf import SDF
+from .slb import SLB
+from .ssa import SSA
 from .swg import SWG
 from .tda import TDA
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#
+#
+#    uCodev Audio Analyzer (uAudioAnalyzer)
+#    Copyright (C) 2022  Pedro A. Hortas <pah@ucodev.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+
+
+import os
+import signal
+import multiprocessing
+import subprocess
+import time
+
+import numpy as np
+
+
+class ALSA():
+    ### (A)dvanced (L)inux (S)ound (A)rchitecture backend (command line tools) ###
+
+    # NOTE: This is an LSP() backend. Backends implement play(), record()
+    #       and loopback(), with the same arguments. When no destination
+    #       file is given, the capture is returned as raw PCM data (uint8)
+    #       instead.
+
+    # Properties
+
+    WIDTHS = {          # Bytes per sample of each sample format (see arecord -f)
+        "S8": 1,
+        "U8": 1,
+        "S16_LE": 2,
+        "S24_3LE": 3,
+        "S32_LE": 4,
+        "FLOAT_LE": 4
+    }
+
+
+    # I/O
+
+    def play(self, filename):
+        # TODO: A low level library is being developed to replace the need of
+        #       external binaries and processes being called here.
+        return subprocess.run([ "aplay", filename ], capture_output = True)
+
+    def record(self, filename, fs, length, channels, ftype, fsubtype):
+        if filename is None:
+            return self.capture(fs, length, channels, fsubtype)
+
+        # TODO: See play() comments. This will be replaced.
+        return subprocess.run([ "arecord", "-f", fsubtype, "-r", str(fs), "-d", str(int(length)), "-c", str(channels), "-t", ftype, filename ], capture_output = True)
+
+    def capture(self, fs, length, channels, fsubtype):
+        # The recorder writes raw data to its stdout, which is read straight
+        # into a buffer allocated (once) for the whole capture
+        if fsubtype not in self.WIDTHS:
+            raise Exception("Unsupported sample format: %s" % fsubtype)
+
+        data = np.zeros(int(length) * fs * channels * self.WIDTHS[fsubtype], dtype = np.uint8)
+        view = memoryview(data)
+        count = 0
+
+        # TODO: See play() comments. This will be replaced.
+        p = subprocess.Popen([ "arecord", "-q", "-f", fsubtype, "-r", str(fs), "-d", str(int(length)), "-c", str(channels), "-t", "raw", "-" ], stdout = subprocess.PIPE, stderr = subprocess.DEVNULL)
+
+        try:
+            while count < data.size:
+                n = p.stdout.readinto(view[count:])
+
+                if not n:
+                    break
+
+                count += n
+        finally:
+            p.stdout.close()
+            p.wait()
+
+        if p.returncode:
+            raise Exception("Unable to capture from the recording device (arecord exit status: %d)" % p.returncode)
+
+        # A short capture would otherwise be padded with (silent) zeros
+        if count < data.size:
+            raise Exception("Incomplete capture from the recording device (%d of %d bytes)" % (count, data.size))
+
+        return data
+
+    def loopback(self, filename_src, filename_dst, fs, length, channels, ftype, fsubtype, io_delay = 1.15):
+        # TODO: This approach is far from ideal. It is currently serving
+        # as duct tape to integrate with other functionalities.
+        #
+        # A low level library is being developed to replace the need of
+        # external binaries and processes being called here.
+
+        p = multiprocessing.Process(target = self.play, args = (filename_src, ))
+
+        p.start()
+
+        os.setpgid(p.pid, p.pid)
+
+        time.sleep(io_delay)
+
+        try:
+            return self.record(filename_dst, fs, length, channels, ftype, fsubtype)
+        finally:
+            pid = p.pid
+
+            p.terminate()
+
+            os.killpg(os.getpgid(pid), signal.SIGTERM)
+
@@ -20,9 +20,15 @@
 #
 
 
+import warnings
+
 import numpy as np
 
-from scipy.fftpack import fft,fftfreq
+from scipy.fft import next_fast_len, rfft, rfftfreq
+from scipy.ndimage import maximum_filter1d
+from scipy.signal import get_window
+
+from .tda import TDA
 
 
 class FDA():
@@ -35,7 +41,7 @@ class FDA():
 
     __tda = None                 # Time-Domain Signal data
     __dci = None                 # Device Calibration Interface
-    __spectrum_fft = None        # Spectrum Data from Signal
+    __spectrum_fft = None        # Spectrum Data from Signal (positive frequencies only)
     __spectrum_magn = None       # Magnitudes from complex FFT result 
     __spectrum_phase = None      # Phase angles from complex FFT result
     __spectrum_fftfreq = None    # Bins from sampling frequency
@@ -46,6 +52,25 @@ class FDA():
     __ffreq = None               # Fundamental Frequency
     __pn_list = None             # Phase Noise
     __h_idxs_list = None         # List of Harmonics indexes
+    __fft_workers = None         # Number of worker threads used by the FFT (None for the scipy default)
+    __fft_fast_len = None        # If True, zero-pad the averaged segments to the next fast FFT length
+    __fft_size = None            # Number of points of the FFT (signal size plus fast length padding)
+    __avg_size = None            # Segment size of the averaged spectrum (None for a single FFT of the whole signal)
+    __avg_overlap = None         # Overlap between consecutive segments of the averaged spectrum [ 0., 1. [
+    __avg_window = None          # Window applied to each segment of the averaged spectrum (see scipy.signal.get_window())
+    __avg_n = None               # Number of segments in the averaged spectrum
+    __stream = None              # If True, keep averaging the spectrum of new segments across refreshes (blocks)
+    __stream_power = None        # Sum of the power spectra of all the segments averaged so far (stream)
+    __stream_tail = None         # Samples from the previous blocks not yet covered by a full segment (stream)
+    __fda_channels = None        # List of FDA() objects, one per channel (multi-channel signals only)
+    __spectra = None             # Names of the derived spectra kept once calculated, e.g. [ "magn_db" ] (None for all)
+    __memo = None                # Per-refresh cache of calculated metrics, keyed by method and arguments
+
+    __fftfreq_cache = {}         # Shared (read-only) bins, keyed by (size, fs)
+    __window_cache = {}          # Shared (read-only) windows and their properties, keyed by (name, size)
+
+    AVG_BATCH = 1 << 22          # Maximum number of samples transformed at once by the averaged spectrum
+    SKIRT_FLOOR = 0.1            # Leakage of a windowed tone (relative to the noise floor) above which a bin is part of its skirt
 
     N1D76 = None                 # See __init__() and/or load()
     N6D02 = None                 # See __init__() and/or load()
@@ -53,8 +78,8 @@ class FDA():
 
     # Initializers, Loaders and Reloaders
 
-    def __init__(self, tda, dci, process = True, normalize = True, analyze = True, freq_start = None, freq_stop = None):
-        self.__init_args = [ tda, dci, process, normalize, analyze, freq_start, freq_stop ]
+    def __init__(self, tda, dci, process = True, normalize = True, analyze = True, freq_start = None, freq_stop = None, fft_workers = None, fft_fast_len = False, avg_size = None, avg_overlap = 0.5, avg_window = "blackmanharris", stream = False, spectra = None, spectrum = None):
+        self.__init_args = [ tda, dci, process, normalize, analyze, freq_start, freq_stop, fft_workers, fft_fast_len, avg_size, avg_overlap, avg_window, stream, spectra, spectrum ]
 
         self.__refresh = self.load(*self.__init_args)
 
@@ -63,7 +88,7 @@ class FDA():
         except StopIteration:
             pass
 
-    def load(self, tda, dci, process = True, normalize = True, analyze = True, freq_start = None, freq_stop = None):
+    def load(self, tda, dci, process = True, normalize = True, analyze = True, freq_start = None, freq_stop = None, fft_workers = None, fft_fast_len = False, avg_size = None, avg_overlap = 0.5, avg_window = "blackmanharris", stream = False, spectra = None, spectrum = None):
         self.N1D76 = 10 * np.log10(3. / 2) # See: Analog Devices MT-229, Equation 11
         self.N6D02 = 20 * np.log10(2)      # See: Analog Devices MT-229, Equation 11
 
@@ -75,15 +100,42 @@ class FDA():
 
         self.freq_start(freq_start)
         self.freq_stop(freq_stop)
+        self.fft_workers(fft_workers)
+        self.fft_fast_len(fft_fast_len)
+        self.avg_size(avg_size)
+        self.avg_overlap(avg_overlap)
+        self.avg_window(avg_window)
+        self.stream(stream)
+        self.spectra(spectra)
+
+        if stream is True and avg_size is None:
+            raise Exception("Streaming requires an averaged spectrum ('avg_size').")
+
+        # Nothing was streamed yet
+        self.avg_n(0)
+        self.stream_power(0.)
+        self.stream_tail(np.zeros(0))
+
+        # Per-channel FDA objects are only created for multi-channel signals
+        self.fda_channels([])
 
         while True:
             self.tda(tda)
             self.dci(dci)
 
+            # Metrics calculated from the previous spectrum are now stale
+            self.memo({})
+
             if process is True:
-                self._process()
+                self._process(spectrum)
+
+                # A precomputed spectrum only matches the signal it was
+                # loaded with.
+                spectrum = None
 
-                if normalize is True:
+                if normalize is True and self.multichannel() is True:
+                    self._normalize_channels(analyze)
+                elif normalize is True:
                     self._normalize()
 
                     if analyze is True:
@@ -163,6 +215,8 @@ class FDA():
         if abs_fft is not None:
             self.__spectrum_magn = abs_fft
             return self
+        elif self.__spectrum_magn is None:
+            return self._derive("magn")
         else:
             return self.__spectrum_magn
 
@@ -170,6 +224,8 @@ class FDA():
         if angle_fft is not None:
             self.__spectrum_phase = angle_fft
             return self
+        elif self.__spectrum_phase is None:
+            return self._derive("phase")
         else:
             return self.__spectrum_phase
 
@@ -184,6 +240,8 @@ class FDA():
         if fft_norm_magn is not None:
             self.__spectrum_magn_n = fft_norm_magn
             return self
+        elif self.__spectrum_magn_n is None:
+            return self._derive("magn_n")
         else:
             return self.__spectrum_magn_n
 
@@ -191,6 +249,8 @@ class FDA():
         if fft_norm_angle is not None:
             self.__spectrum_phase_n = fft_norm_angle
             return self
+        elif self.__spectrum_phase_n is None:
+            return self._derive("phase_n")
         else:
             return self.__spectrum_phase_n
 
@@ -198,6 +258,8 @@ class FDA():
         if fft_rms is not None:
             self.__spectrum_magn_rms = fft_rms
             return self
+        elif self.__spectrum_magn_rms is None:
+            return self._derive("magn_rms")
         else:
             return self.__spectrum_magn_rms
 
@@ -205,6 +267,8 @@ class FDA():
         if fft_db is not None:
             self.__spectrum_magn_db = fft_db
             return self
+        elif self.__spectrum_magn_db is None:
+            return self._derive("magn_db")
         else:
             return self.__spectrum_magn_db
 
@@ -222,6 +286,100 @@ class FDA():
         else:
             return self.__pn_list
 
+    def fft_workers(self, n = None):
+        if n is not None:
+            self.__fft_workers = n
+            return self
+        else:
+            return self.__fft_workers
+
+    def fft_fast_len(self, status = None):
+        if status is not None:
+            self.__fft_fast_len = status
+            return self
+        else:
+            return self.__fft_fast_len
+
+    def fft_size(self, n = None):
+        if n is not None:
+            self.__fft_size = n
+            return self
+        else:
+            return self.__fft_size
+
+    def avg_size(self, n = None):
+        if n is not None:
+            self.__avg_size = n
+            return self
+        else:
+            return self.__avg_size
+
+    def avg_overlap(self, ratio = None):
+        if ratio is not None:
+            if ratio < 0. or ratio >= 1.:
+                raise Exception("Invalid averaging overlap (must be in the range [ 0., 1. [): %s" % ratio)
+
+            self.__avg_overlap = ratio
+            return self
+        else:
+            return self.__avg_overlap
+
+    def avg_window(self, name = None):
+        if name is not None:
+            self.__avg_window = name
+            return self
+        else:
+            return self.__avg_window
+
+    def avg_n(self, n = None):
+        if n is not None:
+            self.__avg_n = n
+            return self
+        else:
+            return self.__avg_n
+
+    def stream(self, status = None):
+        if status is not None:
+            self.__stream = status
+            return self
+        else:
+            return self.__stream
+
+    def stream_power(self, power = None):
+        if power is not None:
+            self.__stream_power = power
+            return self
+        else:
+            return self.__stream_power
+
+    def stream_tail(self, signal = None):
+        if signal is not None:
+            self.__stream_tail = signal
+            return self
+        else:
+            return self.__stream_tail
+
+    def spectra(self, names = None):
+        if names is not None:
+            self.__spectra = names
+            return self
+        else:
+            return self.__spectra
+
+    def fda_channels(self, fda_list = None):
+        if fda_list is not None:
+            self.__fda_channels = fda_list
+            return self
+        else:
+            return self.__fda_channels
+
+    def memo(self, cache = None):
+        if cache is not None:
+            self.__memo = cache
+            return self
+        else:
+            return self.__memo
+
     def h_idxs(self, h_idxs_list = None, n = 10):
         if h_idxs_list is not None:
             self.__h_idxs_list = h_idxs_list
@@ -232,46 +390,324 @@ class FDA():
             return self.__h_idxs_list[0:n]
 
 
+    # Memoization
+
+    def memoize(self, key, func):
+        # Returns the value cached under 'key' for the current refresh,
+        # calling 'func' to calculate it on the first request.
+        if key not in self.memo():
+            self.memo()[key] = func()
+
+        return self.memo()[key]
+
+
     # Processors and Pre-Processors
 
-    def _process(self):
+    def _process(self, spectrum = None):
         signal = self.tda().signal_n()
 
-        self.spectrum_fft(fft(signal))
-        self.spectrum_fftfreq(fftfreq(signal.size, 1. / self.tda().fs()))
+        # Awkward segment sizes (e.g. with large prime factors) are much
+        # slower to transform than a nearby 5-smooth size, so, if requested,
+        # each (windowed) segment is zero-padded to the next fast length.
+        #
+        # NOTE: The whole signal is never padded. Its tones (carrier and
+        #       harmonics) only fall on single bins at its own length, and
+        #       padding would spread them over the whole spectrum, as the
+        #       signal is not windowed.
+        if self.fft_fast_len() is True and self.avg_size() is not None:
+            self.fft_size(next_fast_len(self.segment_size(), real = True))
+        else:
+            self.fft_size(self.segment_size())
+
+        if spectrum is not None:
+            # The spectrum of this signal was already calculated (e.g. by a
+            # previous run, memory-mapped from the SAC() cache).
+            if spectrum.shape[0] != self.fft_size() // 2:
+                raise Exception("Precomputed spectrum size (%d) doesn't match the FFT size (%d)." % (spectrum.shape[0], self.fft_size() // 2))
+
+            self.spectrum_fft(spectrum)
+        elif self.avg_size() is None:
+            # The signal is real, so the negative frequencies are just the
+            # complex conjugate of the positive ones. Only the positive half
+            # of the spectrum is computed.
+            #
+            # NOTE: Multi-channel signals (frames, channels) are transformed
+            #       by a single call, along the time axis.
+            #
+            # NOTE: The spectrum has the same precision of the signal
+            #       (complex64 for float32 signals), while sums of squares
+            #       are always accumulated as float64.
+            self.spectrum_fft(rfft(signal, n = self.fft_size(), axis = 0, workers = self.fft_workers())[0:self.fft_size() // 2])
+        elif self.stream() is True:
+            self.spectrum_fft(self._process_stream(signal))
+        else:
+            self.spectrum_fft(self._process_avg(signal))
+
+        self.spectrum_fftfreq(self._fftfreq(self.fft_size(), self.tda().fs()))
+
+    def _process_avg(self, signal):
+        # Averaged spectrum (Welch's method): the signal is split into
+        # overlapping segments, each one windowed and transformed, and the
+        # power of each bin is averaged across all the segments.
+        #
+        # NOTE: Phase is not meaningful for an averaged spectrum, so the
+        #       result is real (the square root of the averaged power).
+        #
+        # See: P. D. Welch, "The Use of Fast Fourier Transform for the
+        #      Estimation of Power Spectra"
+        if signal.shape[0] < self.avg_size():
+            raise Exception("Signal is shorter than the averaging segment size (%d < %d)." % (signal.shape[0], self.avg_size()))
+
+        power, n = self._segments_power(signal)
+
+        self.avg_n(n)
+
+        return np.sqrt(power / n)[0:self.fft_size() // 2]
+
+    def _process_stream(self, signal):
+        # Streamed averaged spectrum: only the segments with new samples
+        # are transformed on each refresh, and their power is added to the
+        # power of all the segments from the previous blocks.
+        #
+        # Samples that are not yet covered by a full segment are kept for
+        # the next block, so memory usage doesn't depend on the signal
+        # length nor on the number of blocks.
+        tail = self.stream_tail() if self.avg_n() else signal[0:0]
+
+        signal = np.concatenate((tail, signal[self.tda().sdf().overlap_frames():]))
+
+        if signal.shape[0] >= self.avg_size():
+            power, n = self._segments_power(signal)
+
+            self.stream_power(self.stream_power() + power)
+            self.avg_n(self.avg_n() + n)
+
+            # The next segment starts right after the last step taken
+            signal = signal[n * self.avg_step():]
+
+        self.stream_tail(signal)
+
+        if not self.avg_n():
+            raise Exception("Not enough samples streamed for a single averaging segment (%d < %d)." % (signal.shape[0], self.avg_size()))
+
+        return np.sqrt(self.stream_power() / self.avg_n())[0:self.fft_size() // 2]
+
+    def _segments_power(self, signal):
+        # Returns the sum of the power spectra of all the (windowed)
+        # segments of 'signal', along with the number of segments
+        #
+        # All the segments are taken as a (segments, avg_size) strided view
+        # of the signal (no data is copied), or (segments, channels, avg_size)
+        # for multi-channel signals
+        segments = np.lib.stride_tricks.sliding_window_view(signal, self.avg_size(), axis = 0)[::self.avg_step()]
+
+        # Segments are windowed and transformed in batches, by a single FFT
+        # call each, so memory usage doesn't depend on the signal length.
+        batch = max(1, self.AVG_BATCH // (self.fft_size() * (signal.size // signal.shape[0])))
+        power = 0.
+
+        for i in range(0, segments.shape[0], batch):
+            s = rfft(segments[i:i + batch] * self.window()["window"].astype(signal.dtype, copy = False), n = self.fft_size(), axis = -1, workers = self.fft_workers())
+
+            power += np.sum(np.square(s.real) + np.square(s.imag), axis = 0, dtype = np.float64)
+
+        # Bins along the first axis, as for a single FFT
+        return power.T.astype(signal.dtype, copy = False), segments.shape[0]
+
+    def _fftfreq(self, size, fs):
+        # Frequency bins depend only on the signal size and sampling
+        # frequency, so they are shared by all FDA objects with the same
+        # (size, fs) pair (e.g. when analyzing a set of test frequencies).
+        key = (size, fs)
+
+        if key not in self.__fftfreq_cache:
+            bins = rfftfreq(size, 1. / fs)[0:size // 2]
+            bins.setflags(write = False)
+
+            self.__fftfreq_cache[key] = bins
+
+        return self.__fftfreq_cache[key]
+
+    def _window(self, name, size):
+        # Windows (and their properties) depend only on their name and size,
+        # so they are shared by all FDA objects with the same pair.
+        key = (name, size)
+
+        if key not in self.__window_cache:
+            # Windows with parameters are named as 'name,param[,...]' (e.g.
+            # 'kaiser,38'), see scipy.signal.get_window()
+            try:
+                params = name.split(",")
+
+                window = get_window((params[0], *map(float, params[1:])) if len(params) > 1 else name, size)
+            except (TypeError, ValueError):
+                raise Exception("Invalid averaging window: %s" % name)
+
+            # Main lobe half width, in bins: first minimum of the (16x
+            # oversampled) magnitude response of the window, past its half
+            # magnitude point (flat top windows have ripples before that)
+            response = np.abs(rfft(window, n = size * 16))
+            lobe = np.argmax(response < (response.max() / 2.))
+            lobe += np.argmax(np.diff(response[lobe:]) > 0)
+
+            # Leakage of a tone into the bin 'd' bins away from it (power,
+            # relative to its peak): the highest response of the window
+            # from 'd - 0.5' bins on, as a tone may lie anywhere in its bin
+            envelope = np.maximum.accumulate(response[::-1])[::-1] / response[0]
+
+            table = {
+                "window": window,                                               # Window samples
+                "sum": window.sum(),                                            # Coherent gain (times size)
+                "enbw": size * np.sum(np.square(window)) / np.square(window.sum()), # Equivalent noise bandwidth, in bins
+                "lobe": int(np.ceil(lobe / 16.)),                               # Main lobe half width, in bins
+                "skirt": np.square(envelope[np.maximum((np.arange(size // 2 + 1) * 16) - 8, 0)]) # Leakage of a tone, by distance (bins)
+            }
+
+            table["window"].setflags(write = False)
+            table["skirt"].setflags(write = False)
+
+            self.__window_cache[key] = table
+
+        return self.__window_cache[key]
+
+    def _harmonics(self, n, fs, ffreq, size):
+        # Harmonics (and their aliases) of 'ffreq' for a spectrum of 'size'
+        # bins. See harmonics().
+        #
+        # See: Analog Devices MT-003, Figure 3
+        Nn = n + 1
+        Kn = int(np.ceil(Nn / (fs / ffreq)))
+
+        # |K * FS - N * ffreq|, for every K in [ 0, Kn ] and N in [ 0, Nn ],
+        # ordered by K and then by N
+        h = np.abs(np.subtract.outer(np.arange(Kn + 1) * fs, np.arange(Nn + 1) * ffreq)).ravel()
+        h = h[(h != 0) & (h < (fs / 2)) & (h != ffreq)]
+
+        # Drop duplicates, keeping the order of their first occurrence
+        freqs = h[np.sort(np.unique(h, return_index = True)[1])]
+
+        # Nearest bin of each harmonic (see freq2idx()). Only the bins whose
+        # frequency is exactly a harmonic frequency are harmonic bins.
+        idxs = np.minimum(np.round(freqs * (size / float(fs))).astype(int), (size // 2) - 1)
+
+        table = {
+            "freqs": freqs,                                                     # Frequencies
+            "idxs": idxs,                                                       # Bin indexes
+            "bins": frozenset(idxs[self._fftfreq(size, fs)[idxs] == freqs].tolist()) # Indexes of the bins matching a harmonic frequency
+        }
+
+        table["freqs"].setflags(write = False)
+        table["idxs"].setflags(write = False)
+
+        return table
 
     def _normalize(self):
         # Normalize spectral data
-
-        # Take the polar magnitudes from the rectangular complex FFT result.
-        # This is achieved by np.abs(complex)
-        self.spectrum_magn(np.abs(self.spectrum_fft())[0:self.spectrum_fft().size // 2])
-
-        # Take the polar phase angle from the rectangular complex FFT result.
-        # This is achieved by np.angle(complex)
-        self.spectrum_phase(np.angle(self.spectrum_fft())[0:self.spectrum_fft().size // 2])
-
-        # Normalize magnitudes [ 0., 1. ]
-        self.spectrum_magn_n(np.divide(self.spectrum_magn(), self.spectrum_magn().size))
-        self.spectrum_magn_rms(np.multiply(self.tda().rms() / self.tda().signal_n().max(), self.spectrum_magn_n()))
-        self.spectrum_magn_db(
-            np.add(np.multiply(10, # Multiply by 10x as we are dealing with power, given that the magnitude is being squared below
-                np.log10(
-                    np.divide(np.power(np.divide(self.spectrum_magn_rms(), self.dci().nrms()), 2), self.dci().impedance())
-                            # ^^^^^^^^^ Squared magnitude                                     ^^^
-                )
-            ), self.dci().log_offset())
-        )
-
-        # Normalize phase angles [ -1., 1. ], representing the range of
-        # [ -1*pi, 1*pi ]
-        self.spectrum_phase_n(np.divide(self.spectrum_phase(), np.pi))
+        #
+        # NOTE: Derived spectra (magnitudes, phase angles, ...) are only
+        #       calculated on first access (see _derive()), so the ones from
+        #       the previous spectrum are released here.
+        self._release()
 
         # Set the fundamental frequency
         self.ffreq(self.spectrum_fftfreq()[np.argmax(self.spectrum_magn_n()[1:]) + 1]) # Excluded DC
 
         # Get the first 'n' harmonics, taking aliasing into account
-        self.h_idxs(np.array(list(map(lambda f: self.freq2idx(f), self.gen_harmonics_freq(20)))))
+        self.h_idxs(self.harmonics(20)["idxs"])
+
+    def _derive(self, name):
+        # Calculates the derived spectrum 'name' from the FFT result. It is
+        # kept until the next refresh, unless it was left out of the
+        # spectra() list (memory-lean mode), in which case it is calculated
+        # again on each access.
+        if name == "magn":
+            # Take the polar magnitudes from the rectangular complex FFT result.
+            # This is achieved by np.abs(complex)
+            spectrum = np.abs(self.spectrum_fft())
+        elif name == "phase":
+            # Take the polar phase angle from the rectangular complex FFT result.
+            # This is achieved by np.angle(complex)
+            spectrum = np.angle(self.spectrum_fft())
+        elif name == "magn_n":
+            # Normalize magnitudes [ 0., 1. ]
+            #
+            # NOTE: Fast length padding doesn't add signal energy, so the
+            #       magnitudes are normalized by the unpadded signal size.
+            #
+            # NOTE: Averaged spectra are normalized by the coherent gain of the
+            #       window, so a sinusoid keeps its magnitude.
+            if self.avg_size() is None:
+                spectrum = np.divide(self.spectrum_magn(), float(self.tda().signal_n().shape[0] // 2))
+            else:
+                spectrum = np.divide(self.spectrum_magn(), float(self.window()["sum"] / 2.))
+        elif name == "magn_rms":
+            if self.stream() is True:
+                spectrum = np.multiply(float(self.tda().rms_running() / self.tda().peak_running()), self.spectrum_magn_n())
+            else:
+                spectrum = np.multiply(float(self.tda().rms() / self.tda().stats()["max"]), self.spectrum_magn_n())
+        elif name == "magn_db":
+            power = np.divide(np.power(np.divide(self.spectrum_magn_rms(), self.dci().nrms()), 2), self.dci().impedance())
+                    # ^^^^^^^^^ Squared magnitude                                     ^^^
+
+            # NOTE: Bins may be exactly zero (or underflow to zero when
+            #       squared), in particular on single precision spectra, so
+            #       the power is floored to the smallest normal value of its
+            #       type, keeping the spectrum finite.
+            spectrum = \
+                np.add(np.multiply(10, # Multiply by 10x as we are dealing with power, given that the magnitude is squared above
+                    np.log10(np.maximum(power, np.finfo(power.dtype).tiny))
+                ), self.dci().log_offset())
+        elif name == "phase_n":
+            # Normalize phase angles [ -1., 1. ], representing the range of
+            # [ -1*pi, 1*pi ]
+            spectrum = np.divide(self.spectrum_phase(), np.pi)
+        else:
+            raise Exception("Unknown derived spectrum: %s" % name)
+
+        if self.spectra() is None or name in self.spectra():
+            getattr(self, "spectrum_%s" % name)(spectrum)
+
+        return spectrum
+
+    def _release(self):
+        # Releases all the derived spectra (see _derive())
+        self.__spectrum_magn = None
+        self.__spectrum_phase = None
+        self.__spectrum_magn_n = None
+        self.__spectrum_phase_n = None
+        self.__spectrum_magn_rms = None
+        self.__spectrum_magn_db = None
+
+    def _normalize_channels(self, analyze = True):
+        # Multi-channel signals are transformed at once, but each channel is
+        # normalized (and analyzed) by its own FDA object, from its column
+        # of the spectrum, so all the per-channel metrics are available
+        # through channel() and metric().
+        if not self.fda_channels():
+            fda_channels = []
+
+            for c in range(self.tda().signal_n().shape[1]):
+                tda = TDA(self.tda().sdf(), self.dci(), periods = self.tda().periods(), channel = c)
+
+                fda_channels.append(FDA(tda, self.dci(), process = False, normalize = False, analyze = False, freq_start = self.freq_start(), freq_stop = self.freq_stop(), fft_workers = self.fft_workers(), fft_fast_len = self.fft_fast_len(), avg_size = self.avg_size(), avg_overlap = self.avg_overlap(), avg_window = self.avg_window(), stream = self.stream(), spectra = self.spectra()))
+
+            self.fda_channels(fda_channels)
+        else:
+            # Read the current block of each channel
+            for fda in self.fda_channels():
+                fda.tda().reload(periods = fda.tda().periods())
+
+        for c, fda in enumerate(self.fda_channels()):
+            fda.memo({})
+            fda.fft_size(self.fft_size())
+            fda.avg_n(self.avg_n())
+            fda.spectrum_fft(self.spectrum_fft()[:, c])
+            fda.spectrum_fftfreq(self.spectrum_fftfreq())
+
+            fda._normalize()
+
+            if analyze is True:
+                fda._analyze()
 
     def _analyze(self):
         # Phase noise
@@ -299,6 +735,40 @@ class FDA():
 
     # Filters
 
+    def pn_skirt(self, sdb, track_n = 64):
+        # Returns the number of bins from the start of 'sdb' that belong
+        # to the phase noise skirt of a peak located right before them.
+        #
+        # The skirt extends while the magnitude is decreasing, or while
+        # the next bin is not higher than the last 'track_n' bins of the
+        # skirt. 'sdb' is walked in the direction away from the peak (a
+        # reversed view is expected for the left side of the peak), and
+        # its last bin is never included.
+        #
+        # The skirt ends at the first bin 'k' for which sdb[k + 1] is
+        # higher than all the bins in sdb[k - track_n:k + 1]. Candidates are
+        # evaluated in chunks of growing size with a sliding window maximum.
+        size = sdb.size
+        chunk = min(size, (track_n + 1) * 4)
+
+        while size > 1:
+            seg = sdb[0:chunk]
+
+            # Maximum of seg[k - track_n:k + 1], for each bin 'k'
+            window = maximum_filter1d(seg[:-1], size = track_n + 1, mode = "constant", cval = -np.inf, origin = track_n // 2)
+
+            stop = seg[1:] > window
+
+            if stop.any():
+                return int(stop.argmax())
+
+            if chunk == size:
+                break
+
+            chunk = min(size, chunk * 2)
+
+        return max(size - 1, 0)
+
 
     # Generators
 
@@ -308,21 +778,8 @@ class FDA():
         #
         # See: Analog Devices MT-003, Figure 3
 
-        Nn = n + 1
-        Kn = int(np.ceil(Nn / (self.tda().fs() / self.ffreq())))
-
-        harmonics_freqs = []
-
-        for K in range(0, Kn + 1):
-            for N in range(0, Nn + 1):
-                h = abs((K * self.tda().fs()) - (N * self.ffreq()))
-
-                if h == 0 or h >= (self.tda().fs() / 2) or (h in harmonics_freqs) or h == self.ffreq():
-                    continue
-
-                harmonics_freqs.append(h)
-
-                yield h
+        for h in self.harmonics(n)["freqs"]:
+            yield h
 
 
     # Converters
@@ -331,13 +788,14 @@ class FDA():
         if not idx:
             return None
 
-        return idx / self.tda().length()
+        return idx / (self.fft_size() / float(self.tda().fs()))
 
     def freq2idx(self, freq = None):
         if freq is None:
             return None
 
-        return int(freq * self.tda().length())
+        # Nearest bin
+        return int(round(freq * (self.fft_size() / float(self.tda().fs()))))
 
     def freq2magn(self, freq, mtype = "rms"):
         if mtype == "rms":
@@ -364,9 +822,9 @@ class FDA():
         # See: Analog Devices MT-053, Figure 1
 
         if in_dB is True:
-            return self.spectrum_magn_db()[1:].max()
+            return self.memoize(("S", in_dB), lambda: self.spectrum_magn_db()[1:].max())
         else:
-            return self.spectrum_magn_rms()[1:].max()
+            return self.memoize(("S", in_dB), lambda: self.spectrum_magn_rms()[1:].max())
 
     def D(self, n = 10, no_sqrt = False, freq_start = None, freq_stop = None):
         # (D)istortion
@@ -377,20 +835,26 @@ class FDA():
         if freq_stop is None:
             freq_stop = self.freq_stop()
 
-        harmonics = []
+        def sum_squares():
+            harmonics = []
 
-        for h in self.h_idxs(n = n):
-            if self.idx2freq(h) < freq_start or self.idx2freq(h) > freq_stop:
-                continue
+            for h in self.h_idxs(n = n):
+                if self.idx2freq(h) < freq_start or self.idx2freq(h) > freq_stop:
+                    continue
 
-            harmonics.append(h)
+                harmonics.append(h)
 
-        # If there are no harmonics to process in the supplied range, distortion is 0
-        if not harmonics:
-            return 0.
+            # If there are no harmonics to process in the supplied range, distortion is 0
+            if not harmonics:
+                return None
 
-        # See: Analog Devices MT-053, Figure 1
-        ret = np.sum(np.square(self.spectrum_magn_rms()[harmonics]))
+            # See: Analog Devices MT-053, Figure 1
+            return np.sum(np.square(self.spectrum_magn_rms()[harmonics]), dtype = np.float64)
+
+        ret = self.memoize(("D", n, freq_start, freq_stop), sum_squares)
+
+        if ret is None:
+            return 0.
 
         if no_sqrt is True:
             return ret
@@ -406,17 +870,30 @@ class FDA():
         if freq_stop is None:
             freq_stop = self.freq_stop()
 
-        # See: Analog Devices MT-053, Figure 1
-        noise = np.ma.array(self.spectrum_magn_rms(), mask = False)
+        def sum_squares():
+            # See: Analog Devices MT-053, Figure 1
+            noise = np.ma.array(self.spectrum_magn_rms(), mask = False)
+
+            # Mask DC
+            noise.mask[0] = True
+            # Mask Signal
+            noise.mask[self.spectrum_magn_rms()[1:].argmax() + 1] = True
+            # Mask Harmonics
+            noise.mask[self.h_idxs(n = n)] = True
+
+            if self.avg_size() is None:
+                return np.sum(np.square(self.fft_trim(noise, freq_start, freq_stop)), dtype = np.float64)
 
-        # Mask DC
-        noise.mask[0] = True
-        # Mask Signal
-        noise.mask[self.spectrum_magn_rms()[1:].argmax() + 1] = True
-        # Mask Harmonics
-        noise.mask[self.h_idxs(n = n)] = True
+            # Mask the skirts of the windowed DC, Signal and Harmonics. The
+            # noise of the masked bins is taken as the average noise of the
+            # others.
+            noise.mask |= self.skirts(n = n, freq_start = freq_start, freq_stop = freq_stop)
 
-        ret = np.sum(np.square(self.fft_trim(noise, freq_start, freq_stop)))
+            band = self.fft_trim(noise, freq_start, freq_stop)
+
+            return np.sum(np.square(band), dtype = np.float64) * (band.size / float(max(band.count(), 1))) / self.fft_pad_ratio() / self.enbw()
+
+        ret = self.memoize(("N", n, freq_start, freq_stop), sum_squares)
 
         if no_sqrt is True:
             return ret
@@ -428,7 +905,124 @@ class FDA():
 
     def freq_res(self):
         # Returns the spectrum resolution, in Hz
-        return 1. / self.tda().length_unpadded()
+        if self.avg_size() is not None:
+            return (self.tda().fs() / float(self.avg_size())) / self.fft_pad_ratio()
+
+        return (1. / self.tda().length_unpadded()) / self.fft_pad_ratio()
+
+    def skirts(self, n = 10, freq_start = None, freq_stop = None):
+        # Returns a mask of the bins of the averaged spectrum that belong to
+        # the skirts of the windowed DC, Signal and Harmonics: the bins where
+        # their leakage (see _window()) isn't well below the noise floor.
+        #
+        # The noise floor (median power of the bins in the band, outside of
+        # the skirts) and the skirts are refined until they agree.
+        if freq_start is None:
+            freq_start = self.freq_start()
+
+        if freq_stop is None:
+            freq_stop = self.freq_stop()
+
+        def mask():
+            power = np.square(self.spectrum_magn_rms(), dtype = np.float64)
+
+            tones = np.concatenate(([ 0, power[1:].argmax() + 1 ], self.h_idxs(n = n)))
+
+            # Peak power of each tone, which may lie between two bins
+            levels = np.max([ power[np.clip(tones + i, 0, power.size - 1)] for i in (-1, 0, 1) ], axis = 0)
+
+            # Distance (in bins of the unpadded segment) of each bin to each tone
+            distance = np.abs(np.subtract.outer(np.arange(power.size), tones)) / self.fft_pad_ratio()
+
+            skirt = self.window()["skirt"]
+            leakage = np.dot(skirt[np.minimum(np.round(distance).astype(int), skirt.size - 1)], levels)
+
+            band = np.zeros(power.size, dtype = bool)
+            band[self.freq2idx(freq_start):self.freq2idx(freq_stop)] = True
+            band[0] = False
+
+            if not band.any():
+                return np.zeros(power.size, dtype = bool)
+
+            floor = np.median(power[band])
+            skirts = leakage > (floor * self.SKIRT_FLOOR)
+
+            while (band & ~skirts).any():
+                floor_next = np.median(power[band & ~skirts])
+
+                if floor_next >= floor:
+                    break
+
+                floor = floor_next
+                skirts = leakage > (floor * self.SKIRT_FLOOR)
+
+            if (band & ~skirts).any():
+                return skirts
+
+            # The leakage is above the noise floor over the whole band, so
+            # the noise can't be told apart from it. Only the main lobes are
+            # masked, and the noise measured includes the leakage.
+            warnings.warn("The sidelobes of the '%s' window are above the noise floor, so the measured noise includes the leakage of the signal. Use a window with lower sidelobes (e.g. 'kaiser,38')." % self.avg_window())
+
+            return (distance <= self.window()["lobe"]).any(axis = 1)
+
+        return self.memoize(("skirts", n, freq_start, freq_stop), mask)
+
+    def segment_size(self):
+        # Returns the number of signal samples transformed by each FFT
+        # (the whole signal, unless the spectrum is averaged)
+        if self.avg_size() is not None:
+            return self.avg_size()
+
+        return self.tda().signal_n().shape[0]
+
+    def fft_pad_ratio(self):
+        # Returns the ratio between the FFT size and the segment size.
+        #
+        # Zero-padding the signal to a fast FFT length interpolates the
+        # spectrum, narrowing the bins by this ratio and scaling up the
+        # power summed over any band of bins by the same amount.
+        return self.fft_size() / self.segment_size()
+
+    def multichannel(self):
+        # Returns True if the signal is a 2D (frames, channels) signal
+        return self.tda().signal_n().ndim == 2
+
+    def channel(self, c):
+        # Returns the FDA object of channel 'c' (multi-channel signals only)
+        return self.fda_channels()[c]
+
+    def metric(self, name, *args, **kwargs):
+        # Returns an array with the result of calling the metric method
+        # 'name' (e.g. "thd", "snr", "sfdr") of each channel, with the
+        # supplied arguments
+        #
+        # Example: fda.metric("thd", n = 10, in_dB = True)
+        return np.array([ getattr(fda, name)(*args, **kwargs) for fda in self.fda_channels() ])
+
+    def window(self):
+        # Returns the window applied to the segments of the averaged
+        # spectrum, along with its properties (None if not averaging)
+        if self.avg_size() is None:
+            return None
+
+        return self._window(self.avg_window(), self.avg_size())
+
+    def avg_step(self):
+        # Returns the number of samples between the start of consecutive
+        # segments of the averaged spectrum
+        return max(1, int(round(self.avg_size() * (1. - self.avg_overlap()))))
+
+    def enbw(self):
+        # Returns the equivalent noise bandwidth of the window, in bins.
+        #
+        # Windows widen the bins, scaling up the power of noise summed over
+        # any band of bins by this amount (1.0 without averaging, as the
+        # signal is not windowed).
+        if self.avg_size() is None:
+            return 1.
+
+        return self.window()["enbw"]
 
     def carrier(self, accuracy = 1.0):
         # Get the carrier frequency, with an accuracy of at least
@@ -439,16 +1033,47 @@ class FDA():
         if self.freq_res() <= accuracy:
             return self.ffreq()
 
-        # ... otherwise, we need to pad the original signal with enough
-        # zeros to increase its length to at least 'FS * (1. / accuracy)'
-        signal_padded = np.pad(self.tda().signal_n(), (0, int(self.tda().fs() * np.ceil(1. / accuracy)) - self.tda().signal_n().size))
+        # ... otherwise, the carrier frequency is estimated between the
+        # bins around the fundamental frequency bin 'k', by interpolating
+        # the complex spectrum (rectangular window).
+        #
+        # See: E. Jacobsen, P. Kootsookos, "Fast, Accurate Frequency Estimators"
+        # See: C. Candan, "A Method For Fine Resolution Frequency Estimation
+        #      From Three DFT Samples" (bias correction)
+        def estimate():
+            k = self.freq2idx(self.ffreq())
+
+            if k < 1 or k >= (self.spectrum_fft().size - 1):
+                return self.ffreq()
+
+            x = self.spectrum_fft()[k - 1:k + 2]
+
+            if self.avg_size() is None:
+                delta = np.real((x[0] - x[2]) / ((2 * x[1]) - x[0] - x[2]))
+                delta *= np.tan(np.pi / self.fft_size()) / (np.pi / self.fft_size())
+            else:
+                # Averaged spectra have no phase, so the peak is found by
+                # fitting a parabola to the log magnitudes (windowed) instead.
+                #
+                # See: J. O. Smith, "Spectral Audio Signal Processing",
+                #      Quadratic Interpolation of Spectral Peaks
+                a, b, c = np.log(np.maximum(x, np.finfo(float).tiny))
+
+                delta = 0.5 * (a - c) / (a - (2 * b) + c) if (a - (2 * b) + c) != 0 else 0.
 
-        # ... and take the FFT of the padded signal - now with enough
-        # resolution to grant the requested accuracy
-        s = fft(signal_padded)
+            # Keep the estimate within the fundamental frequency bin
+            delta = np.clip(delta, -0.5, 0.5)
 
-        # Extract the carrier frequency from the FFT bin with the highest magnitude
-        return (np.abs(s[1:s.size // 2]).argmax() + 1) / (signal_padded.size / self.tda().fs())
+            freq = (k + delta) * (self.tda().fs() / self.fft_size())
+
+            # Report the frequency in steps of (at most) 'accuracy' Hertz,
+            # as if taken from the FFT of a signal zero-padded to a length of
+            # 'FS * ceil(1. / accuracy)'
+            bins_hz = int(self.tda().fs() * np.ceil(1. / accuracy)) / self.tda().fs()
+
+            return np.round(freq * bins_hz) / bins_hz
+
+        return self.memoize(("carrier", accuracy), estimate)
 
     def thdn(self, n = 10, in_dB = False, freq_start = None, freq_stop = None):
         # See: Analog Devices MT-003, Equation 5
@@ -461,9 +1086,9 @@ class FDA():
             freq_stop = self.freq_stop()
 
         if in_dB is True:
-            return 20 * np.log10((self.S() / (np.sqrt(self.N(n = n, no_sqrt = True) + self.D(n = n, no_sqrt = True)))))
+            return self.memoize(("thdn", n, in_dB, freq_start, freq_stop), lambda: 20 * np.log10((self.S() / (np.sqrt(self.N(n = n, no_sqrt = True) + self.D(n = n, no_sqrt = True))))))
         else:
-            return 100. * (np.sqrt(self.N(n = n, no_sqrt = True, freq_start = freq_start, freq_stop = freq_stop) + self.D(n = n, no_sqrt = True, freq_start = freq_start, freq_stop = freq_stop)) / self.S())
+            return self.memoize(("thdn", n, in_dB, freq_start, freq_stop), lambda: 100. * (np.sqrt(self.N(n = n, no_sqrt = True, freq_start = freq_start, freq_stop = freq_stop) + self.D(n = n, no_sqrt = True, freq_start = freq_start, freq_stop = freq_stop)) / self.S()))
 
     def thd(self, n = 10, in_dB = False, freq_start = None, freq_stop = None):
         # See: Analog Devices MT-003, Equation 4
@@ -488,9 +1113,9 @@ class FDA():
             freq_stop = self.freq_stop()
 
         if in_dB is True:
-            return 20 * np.log10(self.S() / self.D(n = n, freq_start = freq_start, freq_stop = freq_stop))
+            return self.memoize(("thd", n, in_dB, freq_start, freq_stop), lambda: 20 * np.log10(self.S() / self.D(n = n, freq_start = freq_start, freq_stop = freq_stop)))
         else:
-            return 100. * (self.D(n = n, freq_start = freq_start, freq_stop = freq_stop) / self.S())
+            return self.memoize(("thd", n, in_dB, freq_start, freq_stop), lambda: 100. * (self.D(n = n, freq_start = freq_start, freq_stop = freq_stop) / self.S()))
 
     def snr(self, n = 10, freq_start = None, freq_stop = None):
         # See: Analog Devices MT-003, Equation 13
@@ -501,7 +1126,7 @@ class FDA():
         if freq_stop is None:
             freq_stop = self.freq_stop()
 
-        return 20 * np.log10(self.S() / self.N(n = n, freq_start = freq_start, freq_stop = freq_stop))
+        return self.memoize(("snr", n, freq_start, freq_stop), lambda: 20 * np.log10(self.S() / self.N(n = n, freq_start = freq_start, freq_stop = freq_stop)))
 
     def snr_jitter(self, pn, fc):
         # See: MAXIM AN4466, Page 3
@@ -518,7 +1143,16 @@ class FDA():
         if freq_stop is None:
             freq_stop = self.freq_stop()
 
-        return ((self.thdn(in_dB = True, freq_start = freq_start, freq_stop = freq_stop) - self.N1D76) + (20 * np.log10(self.dci().nfullscale() / self.tda().rms()))) / self.N6D02
+        # Streamed spectra are averaged over all blocks, and so is the RMS
+        rms = self.tda().rms_running() if self.stream() is True else self.tda().rms()
+
+        return self.memoize(("enob", freq_start, freq_stop), lambda: ((self.thdn(in_dB = True, freq_start = freq_start, freq_stop = freq_stop) - self.N1D76) + (20 * np.log10(self.dci().nfullscale() / rms))) / self.N6D02)
+
+    def harmonics(self, n = 10):
+        # Table of the harmonics of the fundamental frequency, including
+        # aliasing, with their frequencies ("freqs"), bin indexes ("idxs")
+        # and the set of spectrum bins matching them ("bins")
+        return self.memoize(("harmonics", n), lambda: self._harmonics(n, self.tda().fs(), self.ffreq(), self.fft_size()))
 
     def worst_other(self, peaks = None, harmonics = None, carrier = None, freq_start = None, freq_stop = None):
         if freq_start is None:
@@ -533,9 +1167,11 @@ class FDA():
         if harmonics is None:
             # No need to filter harmonics in the range [ freq_start, freq_stop ],
             # as 'peaks' is already contained in that range, so any harmonics
-            # from the following list that are outside of [ freq_start, freq_stop ]
+            # from the following table that are outside of [ freq_start, freq_stop ]
             # range will be ignored when 'peaks' is iterated in the 'wo' loop below.
-            harmonics = list(self.gen_harmonics_freq(n = 10))
+            is_harmonic = lambda p: p[2] in self.harmonics(n = 10)["bins"]
+        else:
+            is_harmonic = lambda p: p[0] in harmonics
 
         if carrier is None:
             carrier = self.carrier()
@@ -544,7 +1180,7 @@ class FDA():
         wo = [ 0, -np.inf, 0 ]
 
         for p in peaks:
-            if p[0] in harmonics or p[0] == carrier:
+            if is_harmonic(p) or p[0] == carrier:
                 continue
 
             if p[1] > wo[1]:
@@ -553,66 +1189,83 @@ class FDA():
         return wo
 
     def peaks(self, n = 10, pn_filter = False, track_n = 64, freq_start = None, freq_stop = None):
-        plist = []
-
         if freq_start is None:
             freq_start = self.freq_start()
 
         if freq_stop is None:
             freq_stop = self.freq_stop()
 
-        harmonics = list(self.gen_harmonics_freq(n = n))
+        def find():
+            plist = []
 
-        sdb = np.copy(self.spectrum_magn_db())
+            harmonics = self.harmonics(n = n)["bins"]
+            carrier = self.carrier()
 
-        count = 0
+            sdb = np.copy(self.spectrum_magn_db())
 
-        while count < n:
-            idx = sdb.argmax()
+            # Bins are only ever removed from 'sdb' (set to -inf), so the
+            # next peak is always the highest bin that is still in 'sdb'.
+            # Instead of searching for the maximum on each iteration, the 'k'
+            # highest bins are selected and ordered at once, and candidates
+            # are taken from them until they run out.
+            k = min(sdb.size, max(n, 1) * (track_n + 1) * 4)
 
-            if idx == 0: # Exclude DC
-                sdb[idx] = -np.inf
-                continue
+            while len(plist) < n:
+                if k < sdb.size:
+                    # Include every bin tied with the k-th highest magnitude
+                    top = np.argpartition(sdb, sdb.size - k)[sdb.size - k:]
+                    top = np.flatnonzero(sdb >= sdb[top].min())
+                else:
+                    top = np.arange(sdb.size)
 
-            # Only include the requested frequency range
-            if self.spectrum_fftfreq()[idx] < freq_start or self.spectrum_fftfreq()[idx] > freq_stop:
-                sdb[idx] = -np.inf
-                continue
+                # Sort by descending magnitude. On ties, the lowest index comes first.
+                top = top[np.argsort(-sdb[top], kind = "stable")]
+                top = top[sdb[top] != -np.inf]
 
-            # (freq, magnitude, index, is_harmonic, is_harmonic_even)
-            freq = self.spectrum_fftfreq()[idx]
-            plist.append((freq, sdb[idx], idx, freq in harmonics, (freq / self.carrier()) % 2 == 0))
+                if not top.size:
+                    break
 
-            # Unlikely to happen, but make sure that we are not including
-            # anything that isn't supposed to in the 'plist'
-            assert(plist[-1][0] != -np.inf)
+                for idx in top:
+                    if len(plist) >= n:
+                        break
 
-            sdb[idx] = -np.inf
+                    if sdb[idx] == -np.inf: # Already removed
+                        continue
 
-            count += 1
+                    if idx == 0: # Exclude DC
+                        sdb[idx] = -np.inf
+                        continue
 
-            if pn_filter is not True:
-                continue
+                    # Only include the requested frequency range
+                    if self.spectrum_fftfreq()[idx] < freq_start or self.spectrum_fftfreq()[idx] > freq_stop:
+                        sdb[idx] = -np.inf
+                        continue
+
+                    # (freq, magnitude, index, is_harmonic, is_harmonic_even)
+                    freq = self.spectrum_fftfreq()[idx]
+                    plist.append((freq, sdb[idx], idx, bool(idx in harmonics), (freq / carrier) % 2 == 0))
 
-            # Right-side Processing: Ignore phase noise to the right
-            idx_offset = 1
-            prev = np.array([ sdb[idx] ] * track_n) # Keep track of the last N points
+                    # Unlikely to happen, but make sure that we are not including
+                    # anything that isn't supposed to in the 'plist'
+                    assert(plist[-1][0] != -np.inf)
 
-            while (idx + idx_offset) > 0 and (idx + idx_offset) < (sdb.size - 1) and (sdb[idx + idx_offset] >= sdb[idx + idx_offset + 1] or sdb[idx + idx_offset + 1] <= prev.max()):
-                prev = np.insert(prev[:-1], 0, sdb[idx + idx_offset])
-                sdb[idx + idx_offset] = -np.inf
-                idx_offset += 1
+                    sdb[idx] = -np.inf
 
-            # Left-side Processing: Ignore phase noise to the left
-            idx_offset = -1
-            prev = np.array([ sdb[idx] ] * track_n) # Keep track of the last N points
+                    if pn_filter is not True:
+                        continue
 
-            while (idx + idx_offset) > 0 and (idx + idx_offset) < (sdb.size - 1) and (sdb[idx + idx_offset] >= sdb[idx + idx_offset - 1] or sdb[idx + idx_offset - 1] <= prev.max()):
-                prev = np.insert(prev[:-1], 0, sdb[idx + idx_offset])
-                sdb[idx + idx_offset] = -np.inf
-                idx_offset -= 1
+                    # Right-side Processing: Ignore phase noise to the right
+                    skirt = self.pn_skirt(sdb[idx + 1:], track_n = track_n)
+                    sdb[idx + 1:idx + 1 + skirt] = -np.inf
 
-        return plist
+                    # Left-side Processing: Ignore phase noise to the left
+                    skirt = self.pn_skirt(sdb[idx - 1::-1], track_n = track_n)
+                    sdb[idx - skirt:idx] = -np.inf
+
+            return plist
+
+        # Peaks are returned as a new list, so callers can't change the cached one
+        return list(self.memoize(("peaks", n, pn_filter, track_n, freq_start, freq_stop), find))
 
     def phase_noise(self, offset, carrier = None):
         # See: Analog Devices MT-008, Figure 1
@@ -651,7 +1304,7 @@ class FDA():
         #
         # The following calculation will cause 'dbc_hz' to reflect the
         # Phase Noise Power below the carrier per exactly 1 Hz (dBc/Hz)
-        offset_norm_magn = np.sqrt(np.sum(np.square(self.spectrum_magn_rms()[idx_start:idx_stop])) / hz_range)
+        offset_norm_magn = np.sqrt(np.sum(np.square(self.spectrum_magn_rms()[idx_start:idx_stop]), dtype = np.float64) / hz_range / self.fft_pad_ratio() / self.enbw())
 
         # Get the carrier magnitude
         ffreq_magn = self.freq2magn(carrier)
@@ -663,6 +1316,12 @@ class FDA():
 
     def process_gain(self):
         # See: Analog Devices MT-003, Figure 2
+
+        # Averaged spectra gain from the (windowed) segment size, not from
+        # the signal length
+        if self.avg_size() is not None:
+            return 10 * np.log10(self.avg_size() / (2. * self.enbw()))
+
         return 10 * np.log10((self.tda().fs() * self.tda().length()) / 2.)
 
     def noise_floor(self, center = None, span = None, freq_start = None, freq_stop = None):
@@ -676,7 +1335,7 @@ class FDA():
             freq_stop = self.freq_stop()
 
         # -(SNR measured) - (FFT process gain) + (carrier magnitude in dB)
-        return -self.snr(freq_start = freq_start, freq_stop = freq_stop) - self.process_gain() + self.S(in_dB = True)
+        return self.memoize(("noise_floor", freq_start, freq_stop), lambda: -self.snr(freq_start = freq_start, freq_stop = freq_stop) - self.process_gain() + self.S(in_dB = True))
 
     def sfdr(self, freq_start = None, freq_stop = None):
         # See: Analog Devices MT-003, Figure 4
@@ -695,6 +1354,14 @@ class FDA():
     def dc(self):
         return self.spectrum_magn_db()[0]
 
+    def high(self):
+        # Highest magnitude of the spectrum (DC included), in dB
+        return self.memoize(("high",), lambda: self.spectrum_magn_db().max())
+
+    def low(self):
+        # Lowest magnitude of the spectrum (DC included), in dB
+        return self.memoize(("low",), lambda: self.spectrum_magn_db().min())
+
     def jitter(self, pn, fc):
         # See: MAXIM AN3359
         # See: Analog Devices, MT-008
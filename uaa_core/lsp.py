@@ -21,10 +21,16 @@
 
 
 import os
-import signal
-import multiprocessing
-import subprocess
-import time
+import tempfile
+
+import numpy as np
+
+from scipy.io import wavfile
+from scipy.signal import chirp, correlate
+
+from .alsa import ALSA
+from .sdf import SDF
+from .slb import SLB
 
 
 class LSP():
@@ -42,12 +48,19 @@ class LSP():
     __channels = None       # Channels (recording)
     __ftype = None          # File type (wav or raw; recording)
     __fsubtype = None       # File subtype (wav or raw; recording)
+    __backend = None        # Audio I/O backend: ALSA() (default) or SLB() (simulated loopback)
+    __capture = None        # Raw data (uint8) of the last in-memory capture (no destination file)
+    __latency = None        # Measured round-trip latency (seconds; see latency_detect()), if known
+    __settle = None         # Time allowed for the signal to settle, after it reaches the capture (seconds)
+
+    MARKER_LENGTH = 0.05    # Length of the latency marker stimulus (seconds)
+    MARKER_SNR = 10.        # Minimum ratio between the correlation peak and its RMS, for a marker to be detected
 
 
     # Initializers, Loaders and Reloaders
 
-    def __init__(self, filename_src = None, filename_dst = None, fs = 48000, length = 2, channels = 1, ftype = "raw", fsubtype = "S24_3LE", standalone = False, io_delay = 1.15):
-        self.__init_args = [ filename_src, filename_dst, fs, length, channels, ftype, fsubtype, standalone, io_delay ]
+    def __init__(self, filename_src = None, filename_dst = None, fs = 48000, length = 2, channels = 1, ftype = "raw", fsubtype = "S24_3LE", standalone = False, io_delay = 1.15, backend = None, latency = None, settle = 0.1):
+        self.__init_args = [ filename_src, filename_dst, fs, length, channels, ftype, fsubtype, standalone, io_delay, backend, latency, settle ]
 
         self.__refresh = self.load(*self.__init_args)
 
@@ -56,7 +69,7 @@ class LSP():
         except StopIteration:
             pass
 
-    def load(self, filename_src = None, filename_dst = None, fs = 48000, length = 2, channels = 1, ftype = "raw", fsubtype = "S24_3LE", standalone = False, io_delay = 1.15):
+    def load(self, filename_src = None, filename_dst = None, fs = 48000, length = 2, channels = 1, ftype = "raw", fsubtype = "S24_3LE", standalone = False, io_delay = 1.15, backend = None, latency = None, settle = 0.1):
         self.filename_src(filename_src)
         self.filename_dst(filename_dst)
         self.fs(fs)
@@ -64,18 +77,23 @@ class LSP():
         self.channels(channels)
         self.ftype(ftype)
         self.fsubtype(fsubtype)
+        self.backend(backend if backend is not None else ALSA())
+        self.latency(latency)
+        self.settle(settle)
 
         while True:
             if standalone is True:
-                if self.filename_dst() is None or self.filename_src() is None:
-                    raise Exception("When 'standalone' is True, both source and destination filenames must be provided.")
+                if self.filename_src() is None:
+                    raise Exception("When 'standalone' is True, the source filename must be provided.")
 
+                # With no destination file, the capture is kept in memory,
+                # as raw data (see capture())
                 self._process(io_delay = io_delay)
 
             yield
 
     def reload(self, standalone = False, io_delay = 1.15):
-        self.__refresh = self.load(self.filename_src(), self.filename_dst(), self.fs(), self.length(), self.channels(), self.ftype(), self.fsubtype(), standalone, io_delay)
+        self.__refresh = self.load(self.filename_src(), self.filename_dst(), self.fs(), self.length(), self.channels(), self.ftype(), self.fsubtype(), standalone, io_delay, self.backend(), self.latency(), self.settle())
 
         try:
             self.refresh()
@@ -151,31 +169,50 @@ class LSP():
         else:
             return self.__fsubtype
 
+    def capture(self, data = None):
+        if data is not None:
+            self.__capture = data
+            return self
+        else:
+            return self.__capture
 
-    # Processors and Pre-Processors
-
-    def _process(self, io_delay = 1.15):
-        # TODO: This approach is far from ideal. It is currently serving
-        # as duct tape to integrate with other functionalities.
-        #
-        # A low level library is being developed to replace the need of
-        # external binaries and processes being called here.
-
-        p = multiprocessing.Process(target = self.play)
+    def backend(self, obj = None):
+        if obj is not None:
+            self.__backend = obj
+            return self
+        else:
+            return self.__backend
 
-        p.start()
+    def latency(self, nr_secs = None):
+        if nr_secs is not None:
+            self.__latency = nr_secs
+            return self
+        else:
+            return self.__latency
 
-        os.setpgid(p.pid, p.pid)
+    def settle(self, nr_secs = None):
+        if nr_secs is not None:
+            self.__settle = nr_secs
+            return self
+        else:
+            return self.__settle
 
-        time.sleep(io_delay)
 
-        self.record()
+    # Processors and Pre-Processors
 
-        pid = p.pid
+    def _process(self, io_delay = 1.15):
+        # With a measured latency, the recording starts as soon as the
+        # signal is present (and settled), instead of after a fixed delay
+        # covering the worst case. The capture then begins at the settled
+        # region of the signal.
+        if self.latency() is not None:
+            io_delay = max(0., self.latency() + self.settle())
 
-        p.terminate()
+        # Play the source and record the destination, through the backend
+        data = self.backend().loopback(self.filename_src(), self.filename_dst(), self.fs(), self.length(), self.channels(), self.ftype(), self.fsubtype(), io_delay = io_delay)
 
-        os.killpg(os.getpgid(pid), signal.SIGTERM)
+        if self.filename_dst() is None:
+            self.capture(data)
 
 
     # I/O
@@ -187,15 +224,12 @@ class LSP():
             else:
                 raise Exception("No source file was specified.")
 
-        # TODO: See _process() comments. This will be replaced.
-        return subprocess.run([ "aplay", filename ], capture_output = True)
+        return self.backend().play(filename)
 
     def record(self, filename = None, fs = None, length = None, channels = None, ftype = None, fsubtype = None):
+        # With no destination file, the capture is kept in memory
         if filename is None:
-            if self.filename_dst() is not None:
-                filename = self.filename_dst()
-            else:
-                raise Exception("No destination file was specified.")
+            filename = self.filename_dst()
 
         if fs is None:
             fs = self.fs()
@@ -212,7 +246,69 @@ class LSP():
         if fsubtype is None:
             fsubtype = self.fsubtype()
 
-        # TODO: See _process() comments. This will be replaced.
-        return subprocess.run([ "arecord", "-f", fsubtype, "-r", str(fs), "-d", str(int(length)), "-c", str(channels), "-t", ftype, filename ], capture_output = True)
+        data = self.backend().record(filename, fs, length, channels, ftype, fsubtype)
+
+        if filename is None:
+            self.capture(data)
+
+        return data
+
+
+    # Synthesizers
+
+    def marker_synth(self):
+        # A short (windowed) linear chirp: its autocorrelation has a single,
+        # sharp peak, so its position in a capture is found unambiguously
+        samples = np.linspace(0, self.MARKER_LENGTH, int(self.fs() * self.MARKER_LENGTH), endpoint = False)
+
+        return chirp(samples, f0 = 500., t1 = self.MARKER_LENGTH, f1 = min(8000., self.fs() / 4.)) * np.hanning(samples.size) * 0.5
+
+
+    # Calculators
+
+    def latency_detect(self, latency_max = 1.):
+        # Measures the round-trip latency (seconds) by playing a marker
+        # stimulus (written to a temporary file) and cross-correlating it
+        # with a capture started along with the playback (io_delay = 0).
+        # The capture holds the whole marker for latencies up to
+        # 'latency_max' seconds.
+        #
+        # NOTE: The latency is measured through the same backend (and
+        #       process startup path) used by later captures, so it also
+        #       accounts for the time the backend takes to start recording.
+        marker = self.marker_synth()
+
+        fd, filename = tempfile.mkstemp(prefix = "s_marker_", suffix = ".wav")
+
+        os.close(fd)
+
+        try:
+            try:
+                wavfile.write(filename, self.fs(), marker.astype(np.float32))
+            except Exception as e:
+                raise Exception("Unable to write to file %s: %s" % (filename, e))
+
+            # NOTE: Backends only capture whole seconds
+            data = self.backend().loopback(filename, None, self.fs(), int(np.ceil(self.MARKER_LENGTH + latency_max)), 1, "raw", "S24_3LE", io_delay = 0.)
+        finally:
+            os.unlink(filename)
+
+        capture = SDF(None, ftype = "raw", fs = self.fs(), bit_depth = 24, buffer = data).signal()
+
+        if capture.size < marker.size:
+            raise Exception("Unable to detect the latency: the capture is shorter than the marker.")
+
+        corr = np.abs(correlate(capture, marker, mode = "valid", method = "fft"))
+        rms = np.sqrt(np.mean(np.square(corr)))
+
+        if rms == 0. or corr.max() / rms < self.MARKER_SNR:
+            raise Exception("Unable to detect the latency: marker not found in the capture.")
+
+        # Beyond 'latency_max', the marker may only be partially captured,
+        # and its position can't be trusted
+        if int(np.argmax(corr)) / float(self.fs()) > latency_max:
+            raise Exception("Unable to detect the latency: it exceeds the maximum of %.1f ms (see 'lsp.latency_max')." % (latency_max * 1000.))
 
+        self.latency(int(np.argmax(corr)) / float(self.fs()))
 
+        return self.latency()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+#
+#
+#    uCodev Audio Analyzer (uAudioAnalyzer)
+#    Copyright (C) 2022  Pedro A. Hortas <pah@ucodev.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+class SAC():
+    ### (S)pectrum (A)nalysis (C)ache ###
+
+    # Properties
+
+    __init_args = None  # Original __init__ arguments
+    __refresh = None    # Refresh generator
+
+    __directory = None  # Cache directory (spectra and metrics files)
+    __enabled = None    # If False, nothing is looked up nor stored
+    __manifest = None   # Fingerprint and keys (one per set of parameters) of each known capture, and the metrics of each key
+    __dirty = None      # If True, the manifest has changes not yet written (see sync())
+
+    HASH_CHUNK = 1 << 20        # Number of bytes hashed at once from a capture file
+    MANIFEST = "manifest.json"  # Name of the manifest file, in the cache directory
+    VERSION = 2                 # Format of the cached data (part of every key)
+
+
+    # Initializers, Loaders and Reloaders
+
+    def __init__(self, directory, enabled = True):
+        self.__init_args = [ directory, enabled ]
+
+        self.__refresh = self.load(*self.__init_args)
+
+        try:
+            self.refresh()
+        except StopIteration:
+            pass
+
+    def load(self, directory, enabled = True):
+        self.directory(directory)
+        self.enabled(enabled)
+        self.dirty(False)
+
+        # A missing or damaged manifest only means that every capture is
+        # fingerprinted (hashed) again
+        self.manifest({ "version": self.VERSION, "files": {}, "metrics": {} })
+
+        if enabled is True and os.path.isfile(self._path(self.MANIFEST)):
+            try:
+                with open(self._path(self.MANIFEST), "r") as f:
+                    manifest = json.loads(f.read())
+
+                if manifest.get("version") == self.VERSION:
+                    self.manifest(manifest)
+            except Exception:
+                pass
+
+        while True:
+            yield
+
+    def reload(self):
+        raise Exception("Not implemented.")
+
+    def refresh(self):
+        # NOTE: __next__ is not implemented in the class itself to avoid
+        #       the temptation of using next() for the class object.
+        #       Future implementations of refresh() may not depend on
+        #       internal generators. This way, calling refresh() will
+        #       always be portable, regardless of how it is implemented
+        #       internally.
+        next(self.__refresh)
+
+
+    # Setters and Getters
+    #
+    # NOTE: The built-in decorator @property is not used here so all
+    #       setters/getters defined in this file are consistent with other
+    #       complex forms of setters/getters used throughout the rest
+    #       of this project.
+    #
+    # NOTE: It is possible, however, that this might change to @property in
+    #       the future.
+
+    def directory(self, dname = None):
+        if dname is not None:
+            self.__directory = dname
+            return self
+        else:
+            return self.__directory
+
+    def enabled(self, status = None):
+        if status is not None:
+            self.__enabled = status
+            return self
+        else:
+            return self.__enabled
+
+    def manifest(self, data = None):
+        if data is not None:
+            self.__manifest = data
+            return self
+        else:
+            return self.__manifest
+
+    def dirty(self, status = None):
+        if status is not None:
+            self.__dirty = status
+            return self
+        else:
+            return self.__dirty
+
+
+    # Generators
+
+    def key(self, filename, dci, params):
+        if self.enabled() is not True:
+            return None
+
+        # The key covers everything the cached results depend on: the
+        # capture itself (content, size and modification time), the
+        # calibration data and the analysis parameters.
+        st = os.stat(filename)
+
+        stat = [ st.st_size, st.st_mtime_ns ]
+
+        # Captures whose size and modification time didn't change since
+        # the manifest recorded them keep their content hash without being
+        # read again. Each set of calibration data and parameters has its
+        # own key, so switching between them doesn't drop the others.
+        entry = self.manifest()["files"].get(os.path.abspath(filename))
+
+        if entry is None or entry["stat"] != stat:
+            h = hashlib.blake2b(digest_size = 20)
+
+            h.update(json.dumps(stat).encode())
+
+            try:
+                with open(filename, "rb") as f:
+                    for chunk in iter(lambda: f.read(self.HASH_CHUNK), b""):
+                        h.update(chunk)
+            except Exception as e:
+                raise Exception("Unable to read file %s: %s" % (filename, e))
+
+            # The keys of a changed capture are no longer referred to
+            entry = { "stat": stat, "hash": h.hexdigest(), "keys": [] }
+
+            self.manifest()["files"][os.path.abspath(filename)] = entry
+            self.dirty(True)
+
+        h = hashlib.blake2b(digest_size = 20)
+
+        h.update(json.dumps([ self.VERSION, dci.cal_data(), params, entry["hash"] ], sort_keys = True).encode())
+
+        if h.hexdigest() not in entry["keys"]:
+            entry["keys"].append(h.hexdigest())
+            self.dirty(True)
+
+        return h.hexdigest()
+
+
+    # I/O
+
+    def metrics(self, key):
+        if key is None:
+            return None
+
+        # The manifest already holds the metrics of all the analyzed
+        # captures, so most lookups don't touch the disk
+        if key in self.manifest()["metrics"]:
+            return self.manifest()["metrics"][key]
+
+        if not os.path.isfile(self._path(key + ".json")):
+            return None
+
+        try:
+            with open(self._path(key + ".json"), "r") as f:
+                metrics = json.loads(f.read())["metrics"]
+        except Exception:
+            # A damaged entry is just a cache miss
+            return None
+
+        self.manifest()["metrics"][key] = metrics
+        self.dirty(True)
+
+        return metrics
+
+    def spectrum(self, key):
+        if key is None or not os.path.isfile(self._path(key + ".npy")):
+            return None
+
+        # The spectrum is memory-mapped (read-only), so only the bins
+        # that are actually used are read from the disk.
+        try:
+            return np.asarray(np.load(self._path(key + ".npy"), mmap_mode = "r"))
+        except Exception:
+            return None
+
+    def store(self, key, spectrum, metrics):
+        if key is None:
+            return
+
+        # NOTE: Entries are written to a temporary file and then renamed,
+        #       so an interrupted run never leaves a partial entry behind.
+        #       The spectrum is stored before the metrics, as the metrics
+        #       file marks the entry as complete.
+        #
+        # NOTE: The cache is an optimization only. If it can't be written
+        #       (e.g. read-only capture directories), the results are simply
+        #       not persisted.
+        self.manifest()["metrics"][key] = metrics
+        self.dirty(True)
+
+        try:
+            os.makedirs(self.directory(), exist_ok = True)
+
+            with open(self._path(key + ".npy.tmp"), "wb") as f:
+                np.save(f, np.asarray(spectrum))
+
+            os.replace(self._path(key + ".npy.tmp"), self._path(key + ".npy"))
+
+            self._write(key + ".json", { "metrics": metrics })
+        except (OSError, TypeError, ValueError):
+            # An entry that can't be written (or serialized) isn't cached,
+            # so the manifest must not refer to it either
+            self.manifest()["metrics"].pop(key, None)
+
+    def sync(self):
+        # Write the manifest, if it changed. Captures that no longer exist
+        # are dropped from it, along with metrics no capture refers to, and
+        # the entries of those metrics are removed from the cache directory
+        # (e.g. the ones of captures that were modified since).
+        if self.enabled() is not True or self.dirty() is not True:
+            return
+
+        files = { k: v for k, v in self.manifest()["files"].items() if os.path.isfile(k) }
+        keys = set(key for v in files.values() for key in v["keys"])
+
+        dropped = [ k for k in self.manifest()["metrics"] if k not in keys ]
+
+        self.manifest()["files"] = files
+        self.manifest()["metrics"] = { k: v for k, v in self.manifest()["metrics"].items() if k in keys }
+
+        try:
+            os.makedirs(self.directory(), exist_ok = True)
+
+            self._write(self.MANIFEST, self.manifest())
+        except (OSError, TypeError, ValueError):
+            pass
+
+        for key in dropped:
+            for name in (key + ".npy", key + ".json"):
+                try:
+                    os.unlink(self._path(name))
+                except OSError:
+                    pass
+
+        self.dirty(False)
+
+
+    # Helpers
+
+    def _path(self, name):
+        return os.path.join(self.directory(), name)
+
+    def _write(self, name, data):
+        # Serialized before the temporary file is created, so a failure
+        # never leaves one behind
+        data = json.dumps(data)
+
+        try:
+            with open(self._path(name + ".tmp"), "w") as f:
+                f.write(data)
+
+            os.replace(self._path(name + ".tmp"), self._path(name))
+        except OSError:
+            if os.path.isfile(self._path(name + ".tmp")):
+                os.unlink(self._path(name + ".tmp"))
+
+            raise
+
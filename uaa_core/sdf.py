@@ -20,6 +20,8 @@
 #
 
 
+import io
+
 import numpy as np
 import soundfile as sf
 
@@ -35,9 +37,11 @@ class SDF():
     __refresh = None          # Refresh generator
 
     __filename = None         # The signal data filename
+    __buffer = None           # In-memory signal data (raw), read instead of the file, if set
     __fs = None               # Sampling Frequency
     __blocksize = None        # Number of frames to read per block
     __overlap = None          # Number of frames to rewind between each block
+    __block = None            # Index of the current block (if 'blocksize' was set)
     __channels = None         # Number of Channels
     __length_unpadded = None  # The original length (unpadded, if padding occured) of the sound file in seconds
     __bit_depth = None        # Bit Depth
@@ -45,14 +49,20 @@ class SDF():
     __fsubtype = None         # The subtype of the signal data file
     __mmap = None             # If True, use mmap() when loading file, if supported
     __average_channels = None # If True, average signal levels from all channels (reduce all channels to one, by averaging them)
+    __multichannel = None     # If True, keep all channels as a 2D (frames, channels) signal. Otherwise, keep the first channel only
+    __dtype = None            # Floating point type of the normalized signal ("float64" or "float32")
     __signal = None           # Signal Data
     __normalized = None       # Indicates if the signal amplitude is normalized between [ -1., 1. ]
+    __stats = None            # Signal statistics (see stats()), cached until the signal changes
+
+    RAW_S24_CHUNK = 1 << 20   # Number of samples decoded at once by read_raw_s24()
+    STATS_CHUNK = 1 << 16     # Number of frames reduced at once by signal_stats()
 
 
     # Initializers, Loaders and Reloaders
 
-    def __init__(self, filename, fs = None, ftype = "raw", bit_depth = 0, fsubtype = None, channels = 1, mmap = False, average_channels = False, blocksize = None, overlap = 0):
-        self.__init_args = [ filename, fs, ftype, bit_depth, fsubtype, channels, mmap, average_channels, blocksize, overlap ]
+    def __init__(self, filename, fs = None, ftype = "raw", bit_depth = 0, fsubtype = None, channels = 1, mmap = False, average_channels = False, blocksize = None, overlap = 0, multichannel = False, dtype = "float64", buffer = None):
+        self.__init_args = [ filename, fs, ftype, bit_depth, fsubtype, channels, mmap, average_channels, blocksize, overlap, multichannel, dtype, buffer ]
 
         self.__refresh = self.load(*self.__init_args)
 
@@ -61,8 +71,9 @@ class SDF():
         except StopIteration:
             pass
 
-    def load(self, filename, fs = None, ftype = "raw", bit_depth = 0, fsubtype = None, channels = 1, mmap = False, average_channels = False, blocksize = None, overlap = 0):
+    def load(self, filename, fs = None, ftype = "raw", bit_depth = 0, fsubtype = None, channels = 1, mmap = False, average_channels = False, blocksize = None, overlap = 0, multichannel = False, dtype = "float64", buffer = None):
         self.filename(filename)
+        self.buffer(buffer)
         self.ftype(ftype)
         self.bit_depth(bit_depth)
         self.fsubtype(fsubtype)
@@ -71,8 +82,28 @@ class SDF():
         self.average_channels(average_channels)
         self.blocksize(blocksize)
         self.overlap(overlap)
+        self.multichannel(multichannel)
+        self.dtype(dtype)
+
+        if buffer is not None and ftype != 'raw':
+            raise Exception("In-memory signal data is only supported for the RAW format.")
+
+        # In-memory signal data (e.g. captured by LSP() with no destination
+        # file) is read exactly like a file with the same contents
+        source = filename if buffer is None else io.BytesIO(buffer)
 
-        if ftype == 'wav':
+        if ftype == 'wav' and self.blocksize() is not None:
+            # Load WAV, block by block
+            info = sf.info(filename)
+            fs = info.samplerate
+
+            # Blocks are read as (normalized) floats, so the bit depth is
+            # taken from the file subtype
+            if not bit_depth and info.subtype.startswith("PCM_") and info.subtype[4:].isdigit():
+                self.bit_depth(int(info.subtype[4:]))
+
+            signal = sf.blocks(filename, blocksize = blocksize, overlap = overlap, dtype = dtype)
+        elif ftype == 'wav':
             # Load WAV
             fs, signal = wavfile.read(filename, mmap = mmap)
         elif ftype == 'raw':
@@ -86,16 +117,23 @@ class SDF():
                 raise Exception("RAW format requires 'fsubtype' or 'bit_depth' to be provided.")
 
             if self.blocksize() is not None:
-                signal = sf.blocks(filename, blocksize = blocksize, overlap = overlap, channels = channels, samplerate = fs, format = "RAW", subtype = fsubtype)
+                signal = sf.blocks(source, blocksize = blocksize, overlap = overlap, channels = channels, samplerate = fs, format = "RAW", subtype = fsubtype, dtype = dtype)
+            elif fsubtype == "PCM_24" and buffer is not None:
+                signal = self.decode_s24(np.frombuffer(buffer, dtype = np.uint8), channels = channels, dtype = dtype)
+            elif fsubtype == "PCM_24":
+                # Captures are recorded as S24_3LE, so they're memory-mapped
+                # and decoded straight into a normalized signal
+                signal = self.read_raw_s24(filename, channels = channels, dtype = dtype)
             else:
-                signal, _ = sf.read(filename, channels = channels, samplerate = fs, format = "RAW", subtype = fsubtype)
+                signal, _ = sf.read(source, channels = channels, samplerate = fs, format = "RAW", subtype = fsubtype, dtype = dtype)
         else:
             raise Exception("Unsupported file type: %s" % ftype)
 
         self.fs(fs)
 
         if blocksize is not None:
-            for block in signal:
+            for idx, block in enumerate(signal):
+                self.block(idx)
                 self.signal(block)
 
                 self._process()
@@ -120,7 +158,10 @@ class SDF():
                 mmap = self.mmap(),
                 average_channels = self.average_channels(),
                 blocksize = self.blocksize(),
-                overlap = self.overlap()
+                overlap = self.overlap(),
+                multichannel = self.multichannel(),
+                dtype = self.dtype(),
+                buffer = self.buffer()
             )
 
         try:
@@ -159,6 +200,13 @@ class SDF():
         else:
             return self.__filename
 
+    def buffer(self, data = None):
+        if data is not None:
+            self.__buffer = data
+            return self
+        else:
+            return self.__buffer
+
     def fs(self, freq = None):
         if freq is not None:
             self.__fs = freq
@@ -180,6 +228,13 @@ class SDF():
         else:
             return self.__overlap
 
+    def block(self, idx = None):
+        if idx is not None:
+            self.__block = idx
+            return self
+        else:
+            return self.__block
+
     def channels(self, count = None):
         if count is not None:
             self.__channels = count
@@ -229,9 +284,27 @@ class SDF():
         else:
             return self.__average_channels
 
+    def multichannel(self, status = None):
+        if status is not None:
+            self.__multichannel = status
+            return self
+        else:
+            return self.__multichannel
+
+    def dtype(self, dtype = None):
+        if dtype is not None:
+            if dtype not in ("float64", "float32"):
+                raise Exception("Unsupported signal type: %s" % dtype)
+
+            self.__dtype = dtype
+            return self
+        else:
+            return self.__dtype
+
     def signal(self, data = None):
         if data is not None:
             self.__signal = data
+            self.__stats = None
             return self
         else:
             return self.__signal
@@ -256,11 +329,10 @@ class SDF():
         if data_T_elem_type == np.float32 or data_T_elem_type == np.float64:
             # NOTE: if the element type is float, make sure that it is normalized within [ -1., 1. ].
 
-            if np.abs(self.signal().max()) > 1 or np.abs(self.signal().min()) > 1:
-                speak = np.abs(self.signal().max()) if np.abs(self.signal().max()) > np.abs(self.signal().min()) else np.abs(self.signal().min())
-                self.signal(self.signal() / speak)
+            if np.max(self.stats()["peak"]) > 1:
+                self.signal(self.signal() / np.max(self.stats()["peak"]))
 
-            assert(1 >= self.signal().max() >= self.signal().min() >= -1)
+            assert(1 >= np.max(self.stats()["max"]) and np.min(self.stats()["min"]) >= -1)
 
             if not self.bit_depth():
                 self.bit_depth(64 if data_T_elem_type == np.float64 else 32)
@@ -297,8 +369,14 @@ class SDF():
             raise Exception("Unable to determine bit depth and none was specified.")
 
     def _normalize(self, average_channels = False):
-        # Fetch signal data
-        signal_data = self.signal().T if self.channels() == 1 else self.signal().T[0]
+        # Fetch signal data: all channels, (frames, channels), if they are
+        # to be kept or averaged, otherwise only the first one
+        if self.channels() == 1:
+            signal_data = self.signal().T
+        elif self.multichannel() is True or average_channels is True:
+            signal_data = self.signal()
+        else:
+            signal_data = self.signal().T[0]
 
         # Handle lib-specific nuisances
         if self.bit_depth() and not self.normalized():
@@ -306,13 +384,14 @@ class SDF():
                 # Wav files are processed by scipy, which requires a 8bit
                 # shift towards LSB for 24-bit depth.
                 self.signal(np.right_shift(signal_data, 8))
-        else:
+        elif signal_data.shape != self.signal().shape:
+            # Keep the cached statistics, unless a channel was dropped
             self.signal(signal_data)
 
         if not self.normalized():
             # Determine normalization [ -1., 1. ] based on bit depth.
             if self.bit_depth():
-                self.signal(np.divide(self.signal(), 1 << (self.bit_depth() - 1)))
+                self.signal(np.divide(self.signal(), 1 << (self.bit_depth() - 1), dtype = self.dtype()))
             else:
                 # If no bit depth is specified, or it is 0, raise an
                 # exception as we are unable to proceed.
@@ -322,7 +401,99 @@ class SDF():
         if average_channels is True and self.channels() > 1:
             self.signal(self.signal().mean(axis = 1))
 
+        # Keep the requested precision (e.g. float WAV files are read as
+        # they're stored)
+        if self.signal().dtype != self.dtype():
+            self.signal(self.signal().astype(self.dtype()))
+
         # Consider the signal level normalized from this point on
         self.normalized(True)
 
 
+    # I/O
+
+    def read_raw_s24(self, filename, channels = 1, dtype = "float64"):
+        # Reads a raw signed 24-bit little-endian PCM file (S24_3LE) through
+        # a memory map (see decode_s24()).
+        return self.decode_s24(np.memmap(filename, dtype = np.uint8, mode = "r"), channels = channels, dtype = dtype)
+
+    def decode_s24(self, data, channels = 1, dtype = "float64"):
+        # Decodes signed 24-bit little-endian PCM data (S24_3LE, as uint8),
+        # returning the signal normalized to [ -1., 1. ], with a (frames,
+        # channels) shape if there is more than one channel.
+        #
+        # The float signal is the only allocation made for the whole data.
+        frames = data.size // (3 * channels)
+        signal = np.empty(frames * channels, dtype = dtype)
+
+        if signal.size:
+            # Each sample (but the first one) is viewed as a little-endian
+            # int32 starting one byte earlier, so its 3 bytes are the most
+            # significant ones, and an arithmetic right shift of 8 bits
+            # sign-extends it (the least significant byte belongs to the
+            # previous sample).
+            samples = np.ndarray(shape = (signal.size - 1,), dtype = "<i4", buffer = data, offset = 2, strides = (3,))
+
+            signal[0] = int.from_bytes(data[0:3].tobytes(), "little", signed = True) / float(1 << 23)
+
+            for i in range(0, samples.size, self.RAW_S24_CHUNK):
+                np.multiply(np.right_shift(samples[i:i + self.RAW_S24_CHUNK], 8), 1. / (1 << 23), out = signal[i + 1:i + 1 + self.RAW_S24_CHUNK])
+
+        return signal.reshape(frames, channels) if channels > 1 else signal
+
+
+    # Calculators
+
+    def stats(self):
+        # Returns the statistics of the signal (see signal_stats()),
+        # calculated once per signal (or block)
+        if self.__stats is None:
+            self.__stats = self.signal_stats(self.signal())
+
+        return self.__stats
+
+    def signal_stats(self, signal):
+        # Returns the minimum, maximum, peak (absolute), sum of squares and
+        # mean (DC) values of 'signal', along with its number of frames.
+        #
+        # All of them are reduced together from each chunk of the signal
+        # while it's still cached, so the signal is read from memory only
+        # once (instead of once per value). Multi-channel signals (frames,
+        # channels) are reduced along the time axis, one value per channel.
+        smin = np.inf
+        smax = -np.inf
+        ss = 0.
+        ssum = 0.
+
+        for i in range(0, signal.shape[0], self.STATS_CHUNK):
+            # NOTE: Strided chunks (e.g. a channel of a multi-channel signal)
+            #       are made contiguous, so the results match the ones from
+            #       a single channel signal.
+            #
+            # NOTE: Chunks are reduced as float64, regardless of the signal
+            #       precision.
+            chunk = np.ascontiguousarray(signal[i:i + self.STATS_CHUNK], dtype = np.float64)
+
+            smin = np.minimum(smin, chunk.min(axis = 0))
+            smax = np.maximum(smax, chunk.max(axis = 0))
+            ss = ss + (np.dot(chunk, chunk) if chunk.ndim == 1 else np.einsum("ij,ij->j", chunk, chunk))
+            ssum = ssum + chunk.sum(axis = 0)
+
+        return {
+            "min": smin,                                   # Minimum value
+            "max": smax,                                   # Maximum value
+            "peak": np.maximum(np.abs(smin), np.abs(smax)), # Peak (absolute) value
+            "ss": ss,                                      # Sum of squares
+            "mean": ssum / max(signal.shape[0], 1),         # Mean (DC) value
+            "n": signal.shape[0]                           # Number of frames
+        }
+
+    def overlap_frames(self):
+        # Returns the number of frames at the beginning of the current block
+        # that were already part of the previous block
+        if self.blocksize() is None or not self.block():
+            return 0
+
+        return self.overlap()
+
+
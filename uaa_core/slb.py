@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+#
+#
+#    uCodev Audio Analyzer (uAudioAnalyzer)
+#    Copyright (C) 2022  Pedro A. Hortas <pah@ucodev.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+
+
+import io
+
+import numpy as np
+import soundfile as sf
+
+from numpy.polynomial import chebyshev
+from scipy.signal import resample
+
+
+class SLB():
+    ### (S)imulated (L)oop(B)ack ###
+
+    # NOTE: This is an LSP() backend. Backends implement play(), record()
+    #       and loopback(), with the same arguments. When no destination
+    #       file is given, the capture is returned as raw PCM data (uint8)
+    #       instead.
+    #
+    # NOTE: The stimulus goes through a model of the signal path, instead
+    #       of a sound card, with no real-time waits:
+    #
+    #         stimulus -> harmonic distortion -> gain -> clock drift
+    #                  -> latency -> noise -> capture
+    #
+    #       So the whole acquisition chain (e.g. AAT, AAM and AIC) can be
+    #       tested and benchmarked without audio hardware.
+
+    # Properties
+
+    __init_args = None  # Original __init__ arguments
+    __refresh = None    # Refresh generator
+
+    __gain = None       # Gain of the signal path (dB)
+    __noise = None      # RMS level of the (white, gaussian) noise added to the capture (dBFS)
+    __harmonics = None  # Harmonic distortion, as a list of [ order, level (dBc) ] pairs
+    __latency = None    # Round-trip latency, from the start of playback to the capture input (seconds)
+    __drift = None      # Clock drift of the capture relative to the playback (ppm)
+    __rng = None        # Random number generator (noise)
+    __stimulus = None   # Last played stimulus, as (signal, fs)
+
+    SUBTYPES = {        # ALSA sample formats (see arecord -f) and their soundfile subtypes
+        "S8": "PCM_S8",
+        "U8": "PCM_U8",
+        "S16_LE": "PCM_16",
+        "S24_3LE": "PCM_24",
+        "S32_LE": "PCM_32",
+        "FLOAT_LE": "FLOAT"
+    }
+
+
+    # Initializers, Loaders and Reloaders
+
+    def __init__(self, gain = 0., noise = -120., harmonics = [ [ 2, -100. ], [ 3, -110. ] ], latency = 0.05, drift = 0., seed = None):
+        self.__init_args = [ gain, noise, harmonics, latency, drift, seed ]
+
+        self.__refresh = self.load(*self.__init_args)
+
+        try:
+            self.refresh()
+        except StopIteration:
+            pass
+
+    def load(self, gain = 0., noise = -120., harmonics = [ [ 2, -100. ], [ 3, -110. ] ], latency = 0.05, drift = 0., seed = None):
+        self.gain(gain)
+        self.noise(noise)
+        self.harmonics(harmonics)
+        self.latency(latency)
+        self.drift(drift)
+        self.rng(np.random.default_rng(seed))
+
+        while True:
+            yield
+
+    def reload(self):
+        raise Exception("Not implemented.")
+
+    def refresh(self):
+        # NOTE: __next__ is not implemented in the class itself to avoid
+        #       the temptation of using next() for the class object.
+        #       Future implementations of refresh() may not depend on
+        #       internal generators. This way, calling refresh() will
+        #       always be portable, regardless of how it is implemented
+        #       internally.
+        next(self.__refresh)
+
+
+    # Setters and Getters
+    #
+    # NOTE: The built-in decorator @property is not used here so all
+    #       setters/getters defined in this file are consistent with other
+    #       complex forms of setters/getters used throughout the rest
+    #       of this project.
+    #
+    # NOTE: It is possible, however, that this might change to @property in
+    #       the future.
+
+    def gain(self, db = None):
+        if db is not None:
+            self.__gain = db
+            return self
+        else:
+            return self.__gain
+
+    def noise(self, dbfs = None):
+        if dbfs is not None:
+            self.__noise = dbfs
+            return self
+        else:
+            return self.__noise
+
+    def harmonics(self, h_list = None):
+        if h_list is not None:
+            self.__harmonics = h_list
+            return self
+        else:
+            return self.__harmonics
+
+    def latency(self, nr_secs = None):
+        if nr_secs is not None:
+            self.__latency = nr_secs
+            return self
+        else:
+            return self.__latency
+
+    def drift(self, ppm = None):
+        if ppm is not None:
+            self.__drift = ppm
+            return self
+        else:
+            return self.__drift
+
+    def rng(self, gen = None):
+        if gen is not None:
+            self.__rng = gen
+            return self
+        else:
+            return self.__rng
+
+    def stimulus(self, data = None):
+        if data is not None:
+            self.__stimulus = data
+            return self
+        else:
+            return self.__stimulus
+
+
+    # Processors and Pre-Processors
+
+    def _process(self, signal, fs_src, fs, length, io_delay):
+        # Harmonic distortion: for a sine of peak 'a', a * T_k(x / a) is
+        # its k-th harmonic (T_k being the Chebyshev polynomial of the
+        # first kind), with the same peak value.
+        a = np.abs(signal).max() if signal.size else 0.
+
+        if a > 0. and len(self.harmonics()):
+            coef = np.zeros(max(int(h[0]) for h in self.harmonics()) + 1)
+
+            for order, level in self.harmonics():
+                coef[int(order)] += np.power(10., level / 20.)
+
+            signal = signal + a * chebyshev.chebval(signal / a, coef)
+
+        signal = signal * np.power(10., self.gain() / 20.)
+
+        # Clock drift (and any sampling frequency mismatch): the capture
+        # clock takes (1 + drift) times more samples of the same signal
+        n = int(round(signal.size * (fs / float(fs_src)) * (1. + self.drift() * 1e-6)))
+
+        if n != signal.size:
+            signal = resample(signal, n)
+
+        # The capture starts 'io_delay' seconds after the playback, while
+        # the signal only reaches it 'latency' seconds after the playback
+        offset = int(round((io_delay - self.latency()) * fs))
+        capture = np.zeros(int(length) * fs)
+
+        start = max(0, -offset)
+        end = min(capture.size, signal.size - offset)
+
+        if end > start:
+            capture[start:end] = signal[start + offset:end + offset]
+
+        capture += self.rng().standard_normal(capture.size) * np.power(10., self.noise() / 20.)
+
+        return np.clip(capture, -1., 1.)
+
+
+    # I/O
+
+    def play(self, filename):
+        signal, fs = sf.read(filename, dtype = "float64")
+
+        # Only the first channel is looped back
+        self.stimulus((signal if signal.ndim == 1 else signal[:, 0], fs))
+
+    def record(self, filename, fs, length, channels, ftype, fsubtype):
+        # Recording on its own captures the last played stimulus, as if it
+        # was started along with the playback
+        return self.io_write(filename, self._capture(fs, length, 0.), fs, channels, ftype, fsubtype)
+
+    def loopback(self, filename_src, filename_dst, fs, length, channels, ftype, fsubtype, io_delay = 1.15):
+        self.play(filename_src)
+
+        return self.io_write(filename_dst, self._capture(fs, length, io_delay), fs, channels, ftype, fsubtype)
+
+    def io_write(self, filename, capture, fs, channels, ftype, fsubtype):
+        if fsubtype not in self.SUBTYPES:
+            raise Exception("Unsupported sample format: %s" % fsubtype)
+
+        if channels > 1:
+            capture = np.tile(capture[:, None], (1, channels))
+
+        if filename is None:
+            f = io.BytesIO()
+
+            sf.write(f, capture, fs, format = "RAW", subtype = self.SUBTYPES[fsubtype], endian = "LITTLE")
+
+            return np.frombuffer(f.getbuffer(), dtype = np.uint8)
+
+        try:
+            sf.write(filename, capture, fs, format = "RAW" if ftype == "raw" else "WAV", subtype = self.SUBTYPES[fsubtype], endian = "LITTLE" if ftype == "raw" else "FILE")
+        except Exception as e:
+            raise Exception("Unable to write to file %s: %s" % (filename, e))
+
+
+    # Helpers
+
+    def _capture(self, fs, length, io_delay):
+        if self.stimulus() is None:
+            return self._process(np.zeros(0), fs, fs, length, io_delay)
+
+        return self._process(self.stimulus()[0], self.stimulus()[1], fs, length, io_delay)
+
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+#
+#
+#    uCodev Audio Analyzer (uAudioAnalyzer)
+#    Copyright (C) 2022  Pedro A. Hortas <pah@ucodev.org>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+
+
+import numpy as np
+
+from scipy.fft import irfft, next_fast_len, rfft, rfftfreq
+from scipy.signal.windows import tukey
+
+
+class SSA():
+    ### (S)ine (S)weep (A)nalyzer ###
+
+    # NOTE: The capture of an exponential sine sweep (see SWG.sweep_synth())
+    #       is deconvolved into an impulse response. The linear response
+    #       shows up at the round-trip latency, while the response of each
+    #       harmonic order 'k' shows up sweep_rate() * ln(k) seconds before
+    #       it, so each one is extracted with its own time window:
+    #
+    #         ... | k = 3 | k = 2 | k = 1 (linear) | ...
+    #
+    #       The frequency response (magnitude and phase) and the harmonic
+    #       distortion of each order are then available over the whole
+    #       band of the sweep, from a single capture.
+    #
+    # See: A. Farina, "Simultaneous Measurement of Impulse Response and
+    #      Distortion with a Swept-Sine Technique", AES 108th Convention, 2000
+    #
+    # See: A. Novak, L. Simon, P. Lotton, "Synchronized Swept-Sine: Theory,
+    #      Application, and Implementation", JAES, 2015
+
+    # Properties
+
+    __init_args = None       # Original __init__ arguments
+    __refresh = None         # Refresh generator
+
+    __sdf = None             # Signal Data File (capture of the sweep)
+    __swg = None             # Sine Wave Generator of the sweep (see SWG.sweep_synth())
+    __orders = None          # Highest harmonic order analyzed (2 or more)
+    __ir = None              # Impulse response of the capture (linear and harmonic responses)
+    __ir_peak = None         # Index of the peak of the linear impulse response
+    __freqs = None           # Frequencies (Hz) of the responses
+    __responses = None       # Complex response of each order (1: linear) at each frequency (k: at k times the frequency)
+
+    BAND_TAPER = [ 2., 1.1 ] # The band is tapered from the start frequency up to this ratio of it, and down to the stop frequency from this ratio below it
+    REGULARIZATION = 1e-10   # Added to the power spectrum of the sweep (relative to its peak) when inverted
+    WINDOW_TAPER = 0.2       # Ratio of each impulse response window that is tapered (Tukey window)
+
+
+    # Initializers, Loaders and Reloaders
+
+    def __init__(self, sdf, swg, orders = 5):
+        self.__init_args = [ sdf, swg, orders ]
+
+        self.__refresh = self.load(*self.__init_args)
+
+        try:
+            self.refresh()
+        except StopIteration:
+            pass
+
+    def load(self, sdf, swg, orders = 5):
+        if swg.sweep() is not True:
+            raise Exception("Sine sweep analysis requires an exponential sine sweep (see SWG()).")
+
+        if sdf.fs() != swg.fs():
+            raise Exception("The sweep and its capture have different sampling frequencies.")
+
+        if type(orders) != int or orders < 2:
+            raise Exception("Invalid number of harmonic orders: %s" % orders)
+
+        self.sdf(sdf)
+        self.swg(swg)
+        self.orders(orders)
+
+        while True:
+            self._process()
+
+            yield
+
+    def reload(self):
+        raise Exception("Not implemented.")
+
+    def refresh(self):
+        # NOTE: __next__ is not implemented in the class itself to avoid
+        #       the temptation of using next() for the class object.
+        #       Future implementations of refresh() may not depend on
+        #       internal generators. This way, calling refresh() will
+        #       always be portable, regardless of how it is implemented
+        #       internally.
+        next(self.__refresh)
+
+
+    # Setters and Getters
+    #
+    # NOTE: The built-in decorator @property is not used here so all
+    #       setters/getters defined in this file are consistent with other
+    #       complex forms of setters/getters used throughout the rest
+    #       of this project.
+    #
+    # NOTE: It is possible, however, that this might change to @property in
+    #       the future.
+
+    def sdf(self, obj = None):
+        if obj is not None:
+            self.__sdf = obj
+            return self
+        else:
+            return self.__sdf
+
+    def swg(self, obj = None):
+        if obj is not None:
+            self.__swg = obj
+            return self
+        else:
+            return self.__swg
+
+    def orders(self, n = None):
+        if n is not None:
+            self.__orders = n
+            return self
+        else:
+            return self.__orders
+
+    def ir(self, data = None):
+        if data is not None:
+            self.__ir = data
+            return self
+        else:
+            return self.__ir
+
+    def ir_peak(self, index = None):
+        if index is not None:
+            self.__ir_peak = index
+            return self
+        else:
+            return self.__ir_peak
+
+    def freqs(self, freq_list = None):
+        if freq_list is not None:
+            self.__freqs = freq_list
+            return self
+        else:
+            return self.__freqs
+
+    def responses(self, resp_list = None):
+        if resp_list is not None:
+            self.__responses = resp_list
+            return self
+        else:
+            return self.__responses
+
+
+    # Processors and Pre-Processors
+
+    def _process(self):
+        signal = self.sdf().signal()
+
+        # Only the first channel is analyzed
+        if signal.ndim > 1:
+            signal = signal[:, 0]
+
+        fs = self.swg().fs()
+        rate = self.swg().sweep_rate()
+
+        # The deconvolution must be long enough for the harmonic responses,
+        # which show up before the linear one (wrapped around to the end)
+        n = next_fast_len(signal.size + int(np.ceil(rate * np.log(self.orders() + 1) * fs)) + self.window_size(1), real = True)
+
+        self.ir(irfft(rfft(signal, n) * self.inverse_synth(n), n))
+        self.ir_peak(int(np.argmax(np.abs(self.ir()))))
+
+        # All the orders share the same frequency bins (the linear window
+        # size), so the response of order 'k' at 'k' times a frequency is
+        # just 'k' times its bin
+        size = self.window_size(1)
+        freqs = rfftfreq(size, 1. / fs)
+
+        band = (freqs >= self.swg().freqs()[0] * self.BAND_TAPER[0]) & (freqs <= self.swg().freqs()[1] / self.BAND_TAPER[1])
+        bins = np.nonzero(band)[0]
+
+        responses = []
+
+        for k in range(1, self.orders() + 1):
+            spectrum = rfft(self.ir_order(k))
+
+            # Harmonics above the band of the sweep weren't measured
+            response = np.full(bins.size, np.nan, dtype = complex)
+            valid = (k * bins) < np.count_nonzero(freqs <= self.swg().freqs()[1] / self.BAND_TAPER[1])
+
+            response[valid] = spectrum[k * bins[valid]]
+
+            responses.append(response)
+
+        self.freqs(freqs[bins])
+        self.responses(responses)
+
+
+    # Synthesizers
+
+    def inverse_synth(self, n):
+        # Spectrum (of size 'n') of the inverse filter of the sweep: the
+        # (regularized) inverse of the spectrum of the very same sweep that
+        # was played, so the responses are relative to it.
+        #
+        # NOTE: The usual analytic inverse filter only holds well above the
+        #       start frequency, leaving artifacts over the low frequency
+        #       harmonic responses that this one doesn't.
+        spectrum = rfft(self.swg().signal_synth(), n)
+        power = np.square(np.abs(spectrum))
+
+        return self.band_taper(rfftfreq(n, 1. / self.swg().fs())) * np.conj(spectrum) / (power + power.max() * self.REGULARIZATION)
+
+
+    # Extractors
+
+    def ir_order(self, k):
+        # Impulse response of order 'k' (1: linear), from a window as large
+        # as the gap to the next order, centered on index 0 (zero phase) of
+        # a buffer as large as the linear window: the positive time half is
+        # placed at the start, and the negative time half at the end.
+        #
+        # NOTE: Harmonic responses (even orders in particular) have as much
+        #       content before their center as after it, so the negative
+        #       time half must stay at negative time (the end of the buffer),
+        #       and not be padded away from it.
+        size = self.window_size(k)
+        center = self.ir_peak() - int(round(self.swg().sweep_rate() * np.log(k) * self.swg().fs()))
+
+        segment = np.take(self.ir(), np.arange(center - size // 2, center - size // 2 + size), mode = "wrap") * tukey(size, self.WINDOW_TAPER)
+
+        buffer = np.zeros(self.window_size(1))
+
+        buffer[:size - size // 2] = segment[size // 2:]
+
+        if size // 2 > 0:
+            buffer[-(size // 2):] = segment[:size // 2]
+
+        return buffer
+
+
+    # Calculators
+
+    def band_taper(self, freqs):
+        # Raised cosine (over a log frequency scale) at the band edges, so
+        # the impulse response doesn't ring (its tails would leak into the
+        # harmonic responses)
+        f1, f2 = self.swg().freqs()
+
+        taper = np.zeros(freqs.size)
+        band = (freqs >= f1) & (freqs <= f2)
+
+        taper[band] = 1.
+
+        low = band & (freqs < f1 * self.BAND_TAPER[0])
+        high = band & (freqs > f2 / self.BAND_TAPER[1])
+
+        taper[low] = 0.5 - 0.5 * np.cos(np.pi * np.log(freqs[low] / f1) / np.log(self.BAND_TAPER[0]))
+        taper[high] = 0.5 + 0.5 * np.cos(np.pi * np.log(freqs[high] * self.BAND_TAPER[1] / f2) / np.log(self.BAND_TAPER[1]))
+
+        return taper
+
+    def window_size(self, k):
+        # Gap (samples) between the responses of order 'k' and 'k + 1'
+        return int(self.swg().sweep_rate() * np.log((k + 1.) / k) * self.swg().fs())
+
+    def latency(self):
+        # Round-trip latency (seconds), as measured by the linear response
+        return self.ir_peak() / float(self.swg().fs())
+
+    def fr(self):
+        # Frequency response: magnitude (dB), relative to the sweep
+        return 20 * np.log10(np.abs(self.responses()[0]))
+
+    def phase(self):
+        # Frequency response: phase (radians), without the latency
+        return np.unwrap(np.angle(self.responses()[0]))
+
+    def hd(self, k):
+        # Harmonic distortion of order 'k' (dB, relative to the linear
+        # response). NaN where 'k' times the frequency is above the band.
+        if k < 2 or k > self.orders():
+            raise Exception("Invalid harmonic order: %s" % k)
+
+        return 20 * np.log10(np.abs(self.responses()[k - 1]) / np.abs(self.responses()[0]))
+
+    def thd(self):
+        # Total harmonic distortion (dB, relative to the linear response),
+        # of the orders measured at each frequency
+        power = np.nansum([ np.square(np.abs(r)) for r in self.responses()[1:] ], axis = 0)
+
+        with np.errstate(divide = "ignore"):
+            return np.where(np.isnan(self.responses()[1]), np.nan, 10 * np.log10(power) - 20 * np.log10(np.abs(self.responses()[0])))
+
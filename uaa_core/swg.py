@@ -38,13 +38,17 @@ class SWG():
     __fs = None              # Sampling frequency
     __freqs = None           # List of frequencies
     __amplitudes = None      # List of frequency amplitudes (in the same order as __freqs)
-    __length = None          # Signal length (in seconds)
+    __length = None          # Signal length (in seconds; of each frequency, when stepped)
+    __steps = None           # If True, frequencies are generated one after another (stepped sine), instead of summed
+    __sweep = None           # If True, an exponential sine sweep from the first to the second frequency is generated
+
+    GATE_LENGTH = 0.005      # Length of the fade in and out of each step, or of the sweep (seconds)
 
 
     # Initializers, Loaders and Reloaders
 
-    def __init__(self, filename, ftype = "wav", fs = 48000, freqs = [ 997 ], amplitudes = [ 1. ], length = 2.):
-        self.__init_args = [ filename, ftype, fs, freqs, amplitudes, length ]
+    def __init__(self, filename, ftype = "wav", fs = 48000, freqs = [ 997 ], amplitudes = [ 1. ], length = 2., steps = False, sweep = False):
+        self.__init_args = [ filename, ftype, fs, freqs, amplitudes, length, steps, sweep ]
 
         self.__refresh = self.load(*self.__init_args)
 
@@ -53,7 +57,7 @@ class SWG():
         except StopIteration:
             pass
 
-    def load(self, filename, ftype = "wav", fs = 48000, freqs = [ 997 ], amplitudes = [ 1. ], length = 2.):
+    def load(self, filename, ftype = "wav", fs = 48000, freqs = [ 997 ], amplitudes = [ 1. ], length = 2., steps = False, sweep = False):
         self.filename(filename)
 
         if ftype != "wav":
@@ -81,6 +85,16 @@ class SWG():
         else:
             self.length(length)
 
+        if steps is True and len(amplitudes) != len(freqs):
+            raise Exception("Stepped signals require one amplitude per frequency.")
+        else:
+            self.steps(steps)
+
+        if sweep is True and (len(freqs) != 2 or freqs[0] <= 0 or freqs[1] <= freqs[0] or freqs[1] >= fs / 2.):
+            raise Exception("Sweeps require a start and a stop frequency, increasing and below the Nyquist frequency.")
+        else:
+            self.sweep(sweep)
+
         while True:
             self._process()
 
@@ -94,7 +108,9 @@ class SWG():
                 fs = self.fs(),
                 freqs = self.freqs(),
                 amplitudes = self.amplitudes(),
-                length = self.length()
+                length = self.length(),
+                steps = self.steps(),
+                sweep = self.sweep()
             )
 
         try:
@@ -164,6 +180,20 @@ class SWG():
         else:
             return self.__length
 
+    def steps(self, status = None):
+        if status is not None:
+            self.__steps = status
+            return self
+        else:
+            return self.__steps
+
+    def sweep(self, status = None):
+        if status is not None:
+            self.__sweep = status
+            return self
+        else:
+            return self.__sweep
+
 
     # Processors and Pre-Processors
     
@@ -174,6 +204,12 @@ class SWG():
     # Synthesizers
 
     def signal_synth(self):
+        if self.steps() is True:
+            return self.steps_synth()
+
+        if self.sweep() is True:
+            return self.sweep_synth()
+
         samples = np.linspace(0, self.length(), int(self.fs() * self.length()), endpoint = False)
 
         sines = np.sin(2 * np.pi * self.freqs()[0] * samples) * self.amplitudes()[0]
@@ -186,6 +222,37 @@ class SWG():
 
         return sines
 
+    def steps_synth(self):
+        # Each frequency is a segment of 'length' seconds, gated by a short
+        # (raised cosine) fade in and out, so the steps don't add clicks
+        # (broadband energy) to the signal.
+        samples = np.linspace(0, self.length(), int(self.fs() * self.length()), endpoint = False)
+
+        gate = self.gate(samples.size)
+
+        return np.concatenate([ np.sin(2 * np.pi * f * samples) * a * gate for f, a in zip(self.freqs(), self.amplitudes()) ])
+
+    def sweep_synth(self):
+        # Exponential (synchronized) sine sweep: the instantaneous frequency
+        # grows from freqs[0] by a factor of e every sweep_rate() seconds,
+        # reaching (about) freqs[1] after 'length' seconds.
+        #
+        # See: A. Novak, L. Simon, P. Lotton, "Synchronized Swept-Sine:
+        #      Theory, Application, and Implementation", JAES, 2015
+        samples = np.linspace(0, self.length(), int(self.fs() * self.length()), endpoint = False)
+
+        return np.sin(2 * np.pi * self.freqs()[0] * self.sweep_rate() * (np.exp(samples / self.sweep_rate()) - 1.)) * self.amplitudes()[0] * self.gate(samples.size)
+
+
+    # Calculators
+
+    def sweep_rate(self):
+        # Time (seconds) the sweep takes to grow its frequency by a factor
+        # of e. It's rounded to a whole number of periods of the start
+        # frequency, so the phase of every harmonic of the sweep matches the
+        # sweep itself, shifted in time (see SSA()).
+        return max(1., np.round(self.freqs()[0] * self.length() / np.log(self.freqs()[1] / float(self.freqs()[0])))) / self.freqs()[0]
+
 
     # I/O
 
@@ -193,3 +260,18 @@ class SWG():
         wavfile.write(self.filename(), self.fs(), signal.astype(np.float32))
 
 
+    # Helpers
+
+    def gate(self, size):
+        # Raised cosine fade in and out, so a signal doesn't start or stop
+        # with a click (broadband energy)
+        gate = np.ones(size)
+        fade = min(int(self.fs() * self.GATE_LENGTH), size // 2)
+
+        if fade > 0:
+            gate[:fade] = 0.5 - 0.5 * np.cos(np.pi * np.arange(fade) / fade)
+            gate[-fade:] = gate[:fade][::-1]
+
+        return gate
+
+
@@ -44,15 +44,23 @@ class TDA():
     __rms = None             # RMS amplitude of the normalized signal
     __vrms = None            # RMS amplitude of the normalized signal divided by RMS calibration 
     __vpeak = None           # Peak amplitude of the normalized signal divided by RMS calibration 
+    __rms_running = None     # RMS amplitude of all the normalized signal blocks read so far
+    __peak_running = None    # Peak amplitude of all the normalized signal blocks read so far
+    __running_ss = None      # Sum of squares of all the normalized signal blocks read so far
+    __running_n = None       # Number of samples of all the normalized signal blocks read so far
+    __running_block = None   # Index of the last block accumulated into the running values
+    __running_periods = None # Count, min, sum and max size of the full periods of all the blocks read so far
+    __stats = None           # Statistics of the signal (see SDF.signal_stats())
     __period_cmam = None     # CMAM: Count, min, average, max
                              #       - the total, min, avg and max amount of samples found from all wave periods
     __periods = None         # Set to True if periods were processed. Otherwise, set to False.
+    __channel = None         # Channel selected from a multi-channel signal (None for all channels)
 
 
     # Initializers, Loaders and Reloaders
 
-    def __init__(self, sdf, dci = None, read = True, process = True, normalize = True, periods = True, pad2sec = None):
-        self.__init_args = [ sdf, dci, read, process, normalize, periods, pad2sec ]
+    def __init__(self, sdf, dci = None, read = True, process = True, normalize = True, periods = True, pad2sec = None, channel = None):
+        self.__init_args = [ sdf, dci, read, process, normalize, periods, pad2sec, channel ]
 
         self.__refresh = self.load(*self.__init_args)
 
@@ -61,8 +69,9 @@ class TDA():
         except StopIteration:
             pass
 
-    def load(self, sdf, dci = None, read = True, process = True, normalize = True, periods = True, pad2sec = None):
+    def load(self, sdf, dci = None, read = True, process = True, normalize = True, periods = True, pad2sec = None, channel = None):
         self.periods(periods)
+        self.channel(channel)
 
         if normalize is True and dci is None:
             raise Exception("When 'normalize' is True, 'dci' must be provided.")
@@ -79,6 +88,9 @@ class TDA():
                 if pad2sec is not None and self.signal().size < (self.fs() * pad2sec):
                     # Zero-pad the signal for a final length of 'pad2sec' seconds
                     self.signal(np.pad(self.signal(), (0, (self.fs() * pad2sec) - self.signal().size)))
+                elif channel is not None and sdf.signal().ndim == 2:
+                    # Select a single channel from a multi-channel signal
+                    self.signal(sdf.signal()[:, channel])
                 else:
                     self.signal(sdf.signal())
             else:
@@ -111,7 +123,7 @@ class TDA():
 
         self.periods(periods)
 
-        self.__refresh = self.load(self.sdf(), dci = self.dci(), periods = self.periods())
+        self.__refresh = self.load(self.sdf(), dci = self.dci(), periods = self.periods(), channel = self.channel())
 
         try:
             self.refresh()
@@ -229,6 +241,34 @@ class TDA():
         else:
             return self.__vpeak
 
+    def channel(self, idx = None):
+        if idx is not None:
+            self.__channel = idx
+            return self
+        else:
+            return self.__channel
+
+    def stats(self, stats = None):
+        if stats is not None:
+            self.__stats = stats
+            return self
+        else:
+            return self.__stats
+
+    def rms_running(self, rms = None):
+        if rms is not None:
+            self.__rms_running = rms
+            return self
+        else:
+            return self.__rms_running
+
+    def peak_running(self, peak = None):
+        if peak is not None:
+            self.__peak_running = peak
+            return self
+        else:
+            return self.__peak_running
+
     def period_cmam(self, cmam = None):
         if cmam is not None:
             self.__period_cmam = cmam
@@ -254,89 +294,99 @@ class TDA():
         if not self.sdf().normalized():
             raise Exception("Source signal is not normalized between [ -1., 1. ].")
 
-        assert(self.signal().min() >= -1 and self.signal().max() <= 1)
+        # Statistics are shared with the SDF, unless the signal differs
+        # (e.g. a single channel was selected, or it was padded)
+        if self.signal() is self.sdf().signal():
+            self.stats(self.sdf().stats())
+        else:
+            self.stats(self.sdf().signal_stats(self.signal()))
+
+        assert(np.min(self.stats()["min"]) >= -1 and np.max(self.stats()["max"]) <= 1)
 
         self.signal_n(self.signal())
 
+        # NOTE: Multi-channel signals are 2D (frames, channels), so the
+        #       following values are calculated along the time axis, as
+        #       arrays with one value per channel.
+
         # Calculate normalized RMS value
-        self.rms(np.sqrt(np.sum(np.power(self.signal_n(), 2)) / self.signal_n().size))
+        self.rms(np.sqrt(self.stats()["ss"] / self.stats()["n"]))
 
         # Calculate RMS voltage
         self.vrms(self.rms() / self.dci().nrms())
 
         # Calculate peak voltage
-        self.vpeak(self.signal_n().max() / self.dci().nrms())
+        self.vpeak(self.stats()["max"] / self.dci().nrms())
 
         # Separate signal data into a set of single periods,
         # identified by start and end sample index each
-        #
-        # Requires numpy 1.23
         if self.periods() is True:
-            self.signal_periods(np.fromiter(self.gen_period(), dtype = np.dtype((np.uint32, 2))))
+            self.signal_periods(self.period_detect())
 
             # Calculate the total, min, avg and max size (in samples) of
             # the entire set of periods.
+            #
+            # NOTE: A (short) block may not hold a single full period, and
+            #       then the count is zero (see period_analyze()).
             self.period_cmam(self.period_analyze())
 
+        # Update the running RMS, peak and period values (over all blocks
+        # read so far)
+        self._accumulate()
 
-    # Generators
 
-    def gen_period(self, start = 0, end = -1):
-        start_idx = start
-        end_idx = None
-        s = 1 + start_idx
-        signal_len = self.signal_n().size
-        half_min_res = (1. / (1 << (self.bit_depth() if self.bit_depth() else 32))) / 2.  # Half value of the minimum resolution
-        # Any value below `half_min_res` shall be set to zero
-        # as floating-point round-off error near zero crossings may
-        # become a problem for correct near-zero-sample period allocation.
-        #
-        # Although round() would lead to a much cleaner implementation,
-        # its performance would considerably degrade the speed here.
+    def _accumulate(self):
+        # Only the samples that weren't part of the previous block are
+        # accumulated, so overlapping blocks are not counted twice. The
+        # running values are reset on the first block (or when no blocks
+        # are used at all), and a block is never accumulated twice (e.g.
+        # when reloading).
+        if self.sdf().block() and self.sdf().block() == self.__running_block:
+            return
 
-        while True:
-            # Find a zero crossing from an ascending amplitude
-            while s < (signal_len - 1):
-                # Start index should point to the zero or first positive
-                # sample at the start of the period.
-                sn_prev = 0 if abs(self.signal_n()[s - 1]) < half_min_res else self.signal_n()[s - 1]
-                sn_cur = 0 if abs(self.signal_n()[s]) < half_min_res else self.signal_n()[s]
-                if sn_prev <= 0 and sn_cur > 0: break
-                s += 1
-
-            # Found the start of the period.
-            # start_idx is the sample index that points to a zero or positive
-            # value at the beginning of a period.
-            sn_prev = 0 if abs(self.signal_n()[s - 1]) < half_min_res else self.signal_n()[s - 1]
-            start_idx = (s - 1) if sn_prev == 0 else s
-
-            # We are at the start of a period.
-            zx = False
-            s += 1
-            while s < signal_len:
-                if zx is False:
-                    sn_cur = 0 if abs(self.signal_n()[s]) < half_min_res else self.signal_n()[s]
-                    if sn_cur <= 0: zx = True # Zero crossing detected
-                else:
-                    sn_cur = 0 if abs(self.signal_n()[s]) < half_min_res else self.signal_n()[s]
-                    if sn_cur >= 0: break
+        self.__running_block = self.sdf().block()
 
-                s += 1
+        if not self.sdf().block() or self.__running_n is None:
+            self.__running_ss = 0.
+            self.__running_n = 0
+            self.__running_periods = [ 0, np.inf, 0, 0 ]
+            self.peak_running(-np.inf)
 
-            if end != -1 and s > end: break
+        # Periods ending in the overlap were already counted by the previous
+        # block. Periods cut by the block boundaries are not counted.
+        if self.periods() is True:
+            p = self.signal_periods()[self.signal_periods()[:, 1] >= self.sdf().overlap_frames()]
 
-            # Validate if we have a full period - if not, break the generator
-            try:
-                sn_cur = 0 if abs(self.signal_n()[s]) < half_min_res else self.signal_n()[s]
-                if zx is False or sn_cur < 0: break
-            except: break
+            if p.shape[0]:
+                pr = np.add(1, np.diff(p.astype(np.int64)))
+
+                self.__running_periods[0] += pr.size
+                self.__running_periods[1] = min(self.__running_periods[1], int(pr.min()))
+                self.__running_periods[2] += int(np.sum(pr))
+                self.__running_periods[3] = max(self.__running_periods[3], int(pr.max()))
+
+        if self.sdf().overlap_frames():
+            stats = self.sdf().signal_stats(self.signal_n()[self.sdf().overlap_frames():])
+        else:
+            stats = self.stats()
+
+        if not stats["n"]:
+            return
+
+        self.__running_ss += stats["ss"]
+        self.__running_n += stats["n"]
 
-            # Found the end of the period.
-            # end_idx is the sample index that points to the last negative
-            # value at the end of a period (always less than zero value)
-            end_idx = s - 1
+        self.rms_running(np.sqrt(self.__running_ss / self.__running_n))
+        self.peak_running(np.maximum(self.peak_running(), stats["max"]))
 
-            yield start_idx, end_idx
+
+    # Generators
+
+    def gen_period(self, start = 0, end = -1):
+        # Generates the (start_idx, end_idx) pairs of each full period.
+        # See period_detect() for details.
+        for start_idx, end_idx in self.period_detect(start = start, end = end):
+            yield int(start_idx), int(end_idx)
 
     def gen_waveform(self, n = 1, ffreq = None):
         count = 1
@@ -376,13 +426,107 @@ class TDA():
 
     # Calculators
 
+    def period_detect(self, start = 0, end = -1):
+        # Separate the normalized signal into full periods, each one
+        # identified by a (start_idx, end_idx) pair, where:
+        #
+        #  - start_idx is the sample index that points to a zero or
+        #    positive value at the beginning of a period (the rising zero
+        #    crossing)
+        #
+        #  - end_idx is the sample index that points to the last negative
+        #    value at the end of a period (always less than zero value)
+        #
+        # Returns a 2D array of uint32 with shape (periods, 2).
+
+        # NOTE: Periods of multi-channel signals are detected from the first
+        #       channel.
+        sn = self.signal_n() if self.signal_n().ndim == 1 else self.signal_n()[:, 0]
+        signal_len = sn.size
+        half_min_res = (1. / (1 << (self.bit_depth() if self.bit_depth() else 32))) / 2.  # Half value of the minimum resolution
+        # Any value below `half_min_res` shall be considered zero
+        # as floating-point round-off error near zero crossings may
+        # become a problem for correct near-zero-sample period allocation.
+        #
+        # Instead of rounding every sample, the dead-band is applied by
+        # classifying each sample as positive, negative or zero (neither).
+        pos = sn >= half_min_res
+        neg = sn <= -half_min_res
+
+        # Rising zero crossings: the sample is positive and the previous
+        # one is zero or negative. The last sample cannot start a period.
+        rise = np.flatnonzero(~pos[:-1] & pos[1:]) + 1
+        rise = rise[(rise >= (start + 1)) & (rise < (signal_len - 1))]
+
+        # Falling edges: the first zero or negative sample after a run of
+        # positive samples.
+        fall = np.flatnonzero(pos[:-1] & ~pos[1:]) + 1
+
+        # Rebound edges: the first zero or positive sample after a run of
+        # negative samples.
+        rebound = np.flatnonzero(neg[:-1] & ~neg[1:]) + 1
+
+        # A rising zero crossing is never found inside a period, so each
+        # one of them starts a new period. The period ends right before
+        # the first zero or positive sample that follows the first zero or
+        # negative sample after its start (the descending zero crossing).
+        zx_i = np.searchsorted(fall, rise, side = "right")
+        n = np.argmin(zx_i < fall.size) if (zx_i >= fall.size).any() else zx_i.size
+        rise = rise[:n]
+        zx = fall[zx_i[:n]]
+
+        # If the sample right after the descending zero crossing is already
+        # zero or positive, the period ends there. Otherwise, it ends at the
+        # next rebound edge.
+        e = zx + 1
+        e_ok = e < signal_len
+        e_neg = np.zeros(e.size, dtype = bool)
+        e_neg[e_ok] = neg[e[e_ok]]
+        e_i = np.searchsorted(rebound, e, side = "right")
+        e_ok &= ~e_neg | (e_i < rebound.size)
+        e[e_neg & e_ok] = rebound[e_i[e_neg & e_ok]]
+
+        if end != -1:
+            e_ok &= e <= end
+
+        # Only a contiguous set of full periods (from the first one) is
+        # considered
+        n = np.argmin(e_ok) if not e_ok.all() else e_ok.size
+        rise = rise[:n]
+        e = e[:n]
+
+        # When the sample before the rising zero crossing is zero, the
+        # period starts at that sample
+        start_idx = rise - ~neg[rise - 1]
+
+        return np.stack((start_idx, e - 1), axis = -1).astype(np.uint32)
+
     def period_analyze(self):
         # We add 1 to end_idx, given that end_idx points to the last sample
         # of the detected period, and NOT the first sample of the next period
         pr = np.add(1, np.diff(self.signal_periods()))
 
+        if not pr.size:
+            return (0, 0, 0., 0)
+
         return (pr.size, pr.min(), np.sum(pr) / pr.size, pr.max())
 
+    def period_cmam_running(self):
+        # Same as period_analyze(), over all the blocks read so far
+        if not self.__running_periods:
+            return None
+
+        count, pmin, psum, pmax = self.__running_periods
+
+        if not count:
+            return (0, 0, 0., 0)
+
+        return (count, pmin, psum / count, pmax)
+
+    def length_running(self):
+        # Length (in seconds) of all the blocks read so far
+        return self.__running_n / float(self.fs()) if self.__running_n else 0.
+
     def period_infer(self):
         # Infer period - return the average _number of samples_ per period
         # (how many samples in a period, on average)
@@ -42,6 +42,19 @@ class CLI():
     __blocksize = None  # Argument: block size
     __freq_base = None  # Argument: base frequency
     __cal_file = None   # Argument: calibration file
+    __fft_workers = None  # Option: number of FFT worker threads
+    __fft_fast_len = None # Option: zero-pad signals to the next fast FFT length
+    __avg_size = None     # Option: segment size of the averaged spectrum
+    __avg_overlap = None  # Option: overlap between segments of the averaged spectrum
+    __avg_window = None   # Option: window applied to segments of the averaged spectrum
+    __stream = None       # Option: scan all blocks, averaging their spectra, before reporting
+    __float32 = None      # Option: single precision signals (float32) and spectra (complex64)
+    __multichannel = None # Option: analyze all the channels of a file (the first one is plotted)
+    __no_cache = None     # Option: don't look up nor store spectra and metrics in the analysis cache
+    __load_workers = None # Option: number of processes loading the test frequencies of a directory
+    __out_of_core = None  # Option: stream a file in blocks of bounded size, whatever its length
+    __loopback = None     # Option: audio I/O backend of the loopback signal path ("alsa" or "sim")
+    __sweep = None        # Option: test sweep mode ("discrete", "stepped" or "ess")
 
 
     # Initializers, Loaders and Reloaders
@@ -235,10 +248,161 @@ class CLI():
         else:
             return self.__cal_file
 
+    def fft_workers(self, n = None):
+        if n is not None:
+            try:
+                n = int(n)
+
+                if n == 0: raise Exception()
+            except Exception:
+                raise Exception("Invalid number of FFT workers: %s" % n)
+
+            self.__fft_workers = n
+
+            return self
+        else:
+            return self.__fft_workers
+
+    def fft_fast_len(self, status = None):
+        if status is not None:
+            if status not in (True, False):
+                if str(status).lower() not in ("true", "false", "yes", "no", "1", "0"):
+                    raise Exception("Invalid value for fast length FFT padding (must be true or false): %s" % status)
+
+                status = str(status).lower() in ("true", "yes", "1")
+
+            self.__fft_fast_len = status
+            return self
+        else:
+            return self.__fft_fast_len
+
+    def avg_size(self, n = None):
+        if n is not None:
+            try:
+                n = int(n)
+
+                if n < 2: raise Exception()
+            except Exception:
+                raise Exception("Invalid averaging segment size: %s" % n)
+
+            self.__avg_size = n
+
+            return self
+        else:
+            return self.__avg_size
+
+    def avg_overlap(self, ratio = None):
+        if ratio is not None:
+            try:
+                ratio = float(ratio)
+
+                if ratio < 0. or ratio >= 1.: raise Exception()
+            except Exception:
+                raise Exception("Invalid averaging overlap (must be in the range [ 0., 1. [): %s" % ratio)
+
+            self.__avg_overlap = ratio
+
+            return self
+        else:
+            return self.__avg_overlap
+
+    def avg_window(self, name = None):
+        if name is not None:
+            self.__avg_window = name
+            return self
+        else:
+            return self.__avg_window
+
+    def stream(self, status = None):
+        if status is not None:
+            self.__stream = status
+            return self
+        else:
+            return self.__stream
+
+    def float32(self, status = None):
+        if status is not None:
+            if status not in (True, False):
+                if str(status).lower() not in ("true", "false", "yes", "no", "1", "0"):
+                    raise Exception("Invalid value for single precision (must be true or false): %s" % status)
+
+                status = str(status).lower() in ("true", "yes", "1")
+
+            self.__float32 = status
+            return self
+        else:
+            return self.__float32
+
+    def multichannel(self, status = None):
+        if status is not None:
+            if status not in (True, False):
+                if str(status).lower() not in ("true", "false", "yes", "no", "1", "0"):
+                    raise Exception("Invalid value for multi-channel analysis (must be true or false): %s" % status)
+
+                status = str(status).lower() in ("true", "yes", "1")
+
+            self.__multichannel = status
+            return self
+        else:
+            return self.__multichannel
+
+    def no_cache(self, status = None):
+        if status is not None:
+            self.__no_cache = status
+            return self
+        else:
+            return self.__no_cache
+
+    def load_workers(self, n = None):
+        if n is not None:
+            try:
+                n = int(n)
+
+                if n < 1: raise Exception()
+            except Exception:
+                raise Exception("Invalid number of load workers: %s" % n)
+
+            self.__load_workers = n
+
+            return self
+        else:
+            return self.__load_workers
+
+    def out_of_core(self, status = None):
+        if status is not None:
+            self.__out_of_core = status
+            return self
+        else:
+            return self.__out_of_core
+
+    def loopback(self, name = None):
+        if name is not None:
+            if name not in ("alsa", "sim"):
+                raise Exception("Invalid loopback backend: %s" % name)
+
+            self.__loopback = name
+
+            return self
+        else:
+            return self.__loopback
+
+    def sweep(self, mode = None):
+        if mode is not None:
+            if mode not in ("discrete", "stepped", "ess"):
+                raise Exception("Invalid sweep mode: %s" % mode)
+
+            self.__sweep = mode
+
+            return self
+        else:
+            return self.__sweep
+
 
     # Processors and Pre-Processors
 
     def _process(self):
+        self.parse_options()
+
         if self.argc() < 3:
             raise Exception("Invalid syntax.")
 
@@ -270,6 +434,51 @@ class CLI():
 
     # Parsers
 
+    def parse_options(self):
+        # Options are in the form '--name' or '--name=value' and may be
+        # placed anywhere in the command line. They are removed from the
+        # argument vector, so the positional arguments keep their indexes.
+        args = []
+
+        for arg in self.argv(full = True):
+            if not arg.startswith("--"):
+                args.append(arg)
+                continue
+
+            name, _, value = arg[2:].partition("=")
+
+            if name == "fft-workers":
+                self.fft_workers(value)
+            elif name == "fft-fast-len":
+                self.fft_fast_len(value if value else True)
+            elif name == "avg-size":
+                self.avg_size(value)
+            elif name == "avg-overlap":
+                self.avg_overlap(value)
+            elif name == "avg-window":
+                self.avg_window(value)
+            elif name == "stream":
+                self.stream(True)
+            elif name == "float32":
+                self.float32(value if value else True)
+            elif name == "multichannel":
+                self.multichannel(value if value else True)
+            elif name == "no-cache":
+                self.no_cache(True)
+            elif name == "load-workers":
+                self.load_workers(value)
+            elif name == "out-of-core":
+                self.out_of_core(True)
+            elif name == "loopback":
+                self.loopback(value)
+            elif name == "sweep":
+                self.sweep(value)
+            else:
+                raise Exception("Unknown option: %s" % arg)
+
+        self.argv(args)
+        self.argc(len(args))
+
     def parse_op_test(self):
         self.directory(self.argv(n = 2))
 
@@ -315,5 +524,19 @@ class CLI():
         print("\t%s meter <base frequency>" % argv[0])
         print("\t%s calibrate <base frequency> <cal file>" % argv[0])
         print("\t%s test <directory>" % argv[0])
+        print("\nOptions:\n")
+        print("\t--fft-workers=<n>\tNumber of FFT worker threads (-1 for all CPUs)")
+        print("\t--fft-fast-len[=<bool>]\tZero-pad averaged segments to the next fast FFT length")
+        print("\t--avg-size=<n>\t\tAverage the spectrum of segments of <n> samples (Welch)")
+        print("\t--avg-overlap=<ratio>\tOverlap between averaged segments (default: 0.5)")
+        print("\t--avg-window=<name>\tWindow of averaged segments, with its parameters if any, e.g. kaiser,38 (default: blackmanharris)")
+        print("\t--stream\t\tScan all blocks of a file (blocksize) before reporting their averaged spectrum")
+        print("\t--float32[=<bool>]\tUse single precision signals and spectra (half the memory)")
+        print("\t--multichannel[=<bool>]\tAnalyze all the channels of a file, plotting the first one (single file analysis)")
+        print("\t--no-cache\t\tDon't use the spectra and metrics cache of directory analysis")
+        print("\t--load-workers=<n>\tNumber of processes loading the test frequencies of a directory (default: all CPUs)")
+        print("\t--out-of-core\t\tStream a file of any length in blocks of bounded size (implies --stream)")
+        print("\t--loopback=<name>\tAudio I/O backend: alsa (aplay/arecord) or sim (simulated loopback)")
+        print("\t--sweep=<mode>\t\tTest sweep: discrete (one capture per frequency), stepped (a single capture) or ess (exponential sine sweep)")
 
 